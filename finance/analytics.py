@@ -0,0 +1,149 @@
+from datetime import date
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+from . import fx
+from .models import Budget, MonthlyRollup
+
+MAX_MONTHS = 120
+# Accepted years: a window of MAX_MONTHS around any month in them stays within date's range
+MIN_YEAR, MAX_YEAR = 1900, 2999
+
+
+def parse_month(value):
+    """Parse "YYYY-MM" into the first day of that month; raises ValueError (also for years outside MIN_YEAR..MAX_YEAR)."""
+    year, month = map(int, value.split("-"))
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        raise ValueError(f"year {year} is out of range")
+    return date(year, month, 1)
+
+
+def add_months(month, count):
+    """Shift a first-of-month date by count months (negative to go back)."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(start, end):
+    """Every first-of-month date from start to end inclusive."""
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _timeseries_queries(user, start, end, group_by):
+    fields = ["month", "transaction_type"]
+    if group_by == "category":
+        fields += ["category_id", "category__name"]
+    rows = (
+        MonthlyRollup.objects.filter(user=user, month__gte=start, month__lt=add_months(end, 1))
+        .values(*fields)
+        .annotate(total=Sum(fx.converted("total")))
+        .order_by()
+    )
+    budgets = Budget.objects.filter(
+        user=user, month__gte=start, month__lt=add_months(end, 1)
+    ).values_list("month", "amount")
+    return rows, budgets
+
+
+def _build_timeseries(start, end, group_by, rows, budgets):
+    months = month_range(start, end)
+    series = {
+        month: {"month": f"{month:%Y-%m}", "income": 0.0, "expense": 0.0, "budget": None}
+        for month in months
+    }
+    if group_by == "category":
+        for point in series.values():
+            point["categories"] = {}
+
+    categories = {}
+    for row in rows:
+        point = series[row["month"]]
+        total = float(row["total"] or 0)
+        point[row["transaction_type"]] += total
+        if group_by == "category" and total:
+            point["categories"][row["category_id"]] = total
+            categories[row["category_id"]] = {
+                "id": row["category_id"],
+                "name": row["category__name"],
+                "category_type": row["transaction_type"],
+            }
+
+    for month, amount in budgets:
+        series[month]["budget"] = float(amount)
+
+    result = {
+        "from": f"{start:%Y-%m}",
+        "to": f"{end:%Y-%m}",
+        "group_by": group_by,
+        "series": [series[month] for month in months],
+    }
+    if group_by == "category":
+        result["categories"] = sorted(categories.values(), key=lambda category: category["name"])
+    return result
+
+
+def timeseries(user, start, end, group_by="type"):
+    """Monthly income/expense (optionally per category) plus budgets for [start, end].
+
+    Two queries whatever the range: one GROUP BY over the monthly rollups and one
+    for the budgets. Months without data are filled in here.
+    """
+    rows, budgets = _timeseries_queries(user, start, end, group_by)
+    return _build_timeseries(start, end, group_by, list(rows), list(budgets))
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+async def atimeseries(user, start, end, group_by="type"):
+    """Async version of timeseries."""
+    rows_query, budgets_query = _timeseries_queries(user, start, end, group_by)
+    rows, budgets = await _alist(rows_query), await _alist(budgets_query)
+    return _build_timeseries(start, end, group_by, rows, budgets)
+
+
+def category_breakdown(*transactions):
+    """Total, count and share of its type's total for every category in transaction querysets.
+
+    One grouped query per queryset (hot and archived transactions) with the category name joined in;
+    amounts are converted to the user's currency inside it (see finance.fx).
+    """
+    grouped = {}
+    for queryset in transactions:
+        for row in (
+            queryset.alias(month=TruncMonth("date"))
+            .values("category_id", "category__name", "transaction_type")
+            .annotate(total=Sum(fx.converted("amount")), count=Count("id"))
+            .order_by()
+        ):
+            key = (row["category_id"], row["transaction_type"])
+            if key in grouped:
+                grouped[key]["total"] += row["total"]
+                grouped[key]["count"] += row["count"]
+            else:
+                grouped[key] = row
+    rows = list(grouped.values())
+    totals = {"income": 0.0, "expense": 0.0}
+    for row in rows:
+        totals[row["transaction_type"]] += float(row["total"])
+
+    categories = [
+        {
+            "id": row["category_id"],
+            "name": row["category__name"],
+            "category_type": row["transaction_type"],
+            "total": float(row["total"]),
+            "count": row["count"],
+            "share": round(float(row["total"]) / totals[row["transaction_type"]], 4) if totals[row["transaction_type"]] else 0.0,
+        }
+        for row in rows
+    ]
+    categories.sort(key=lambda category: (category["category_type"], -category["total"], category["name"]))
+    return {"totals": totals, "categories": categories}
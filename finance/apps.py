@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class FinanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'finance'
+
+    def ready(self):
+        from . import signals  # noqa: F401  Connects the cache-invalidation receivers
+        from spend_wise.utils import revocation  # noqa: F401  Connects the blacklist receivers
+        post_migrate.connect(_ensure_search_index, sender=self)
+
+
+def _ensure_search_index(sender, using, **kwargs):
+    from .search import ensure_sqlite_index, sqlite_index_exists
+    if sqlite_index_exists(using):  # Only once migration 0008 has created it
+        ensure_sqlite_index(using)
@@ -0,0 +1,61 @@
+"""Cold tier for old transactions.
+
+`archive_before` moves Transaction rows into ArchivedTransaction, keeping their ids, so the
+hot table and its indexes only hold recent data. No user-visible number changes:
+
+- MonthlyRollup keeps counting archived rows (rollups.rebuild and verify read both tiers),
+  so the summary, budget and timeseries endpoints are unaffected;
+- retrieve falls back to the archive, and the list, export, search and category breakdown
+  read both tiers and merge them;
+- statement imports still skip rows whose import_key is archived.
+"""
+from django.db import transaction
+from django.db.models import Max, Min
+
+from .models import ArchivedTransaction, Transaction
+from .signals import delete_quietly, user_data_changed
+
+FIELDS = ("id", "user_id", "category_id", "amount", "currency", "transaction_type", "description", "date", "import_key")
+
+
+def move(ids, cutoff):
+    """Copy the given transactions dated before `cutoff` into the archive and delete them, atomically.
+
+    Returns the number of rows moved.
+    """
+    with transaction.atomic():
+        # Re-read under a row lock: a row may have been edited since the ids were collected
+        rows = list(
+            Transaction.objects.select_for_update().filter(id__in=ids, date__lt=cutoff).values_list(*FIELDS)
+        )
+        if not rows:
+            return 0
+        ArchivedTransaction.objects.bulk_create([ArchivedTransaction(**dict(zip(FIELDS, row))) for row in rows])
+        delete_quietly(Transaction.objects.filter(id__in=[row[0] for row in rows]))  # Rollups keep counting them
+        for user_id in {row[1] for row in rows}:
+            user_data_changed(user_id)
+    return len(rows)
+
+
+def archive_before(cutoff, batch_size=1000, dry_run=False, progress=None):
+    """Move every transaction dated before `cutoff` into the archive.
+
+    Walks the table by primary-key range, one DB transaction per range, so locks stay short
+    and the job can be stopped and re-run at any point. Returns the number of rows moved
+    (or, with dry_run, that would be moved). `progress` is called with the running total.
+    """
+    bounds = Transaction.objects.aggregate(low=Min("id"), high=Max("id"))
+    total = 0
+    low = bounds["low"]
+    while low is not None and low <= bounds["high"]:
+        ids = list(
+            Transaction.objects.filter(id__gte=low, id__lt=low + batch_size, date__lt=cutoff)
+            .values_list("id", flat=True)
+        )
+        low += batch_size
+        if not ids:
+            continue
+        total += len(ids) if dry_run else move(ids, cutoff)
+        if progress is not None:
+            progress(total)
+    return total
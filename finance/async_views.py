@@ -0,0 +1,159 @@
+"""Async (ASGI) versions of the read-only dashboard endpoints, plus login.
+
+DRF views are sync-only, so these are plain Django async views that
+authenticate with the same cookie JWT (and token cache) as the DRF views
+and share the response cache. Their cache and token lookups don't block
+the event loop; ORM queries run on Django's sync_to_async thread, one
+after another.
+"""
+import json
+from datetime import datetime
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import check_password, make_password
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from spend_wise.utils.authentication import aauthenticate, set_auth_cookies
+from spend_wise.utils.db_router import ause_replica
+
+from . import analytics, rollups
+from .models import Budget
+from .response_cache import acached_per_user, current_month_key
+from .serializers import LoginCredentialsSerializer, users_with_email
+
+
+def verify_password(password, encoded):
+    """(matches, new hash if the stored one uses an outdated hasher or cost) -- the same rule as User.check_password."""
+    upgraded = []
+    matches = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return matches, upgraded[0] if upgraded else None
+
+
+# Password hashing is pure CPU and releases the GIL, so it runs on the default thread pool
+# (not the single thread_sensitive one) and never blocks the event loop or other logins.
+hash_off_thread = sync_to_async(make_password, thread_sensitive=False)
+verify_off_thread = sync_to_async(verify_password, thread_sensitive=False)
+
+
+def async_api_view(view):
+    """GET-only wrapper: authenticates the request, reads from the replica and renders (data, status, cache) as JSON."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+        try:
+            authenticated = await aauthenticate(request)
+        except AuthenticationFailed as exc:
+            return JsonResponse({"detail": str(exc.detail)}, status=401)
+        if authenticated is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+        request.user, request.auth = authenticated
+
+        async with ause_replica(request.user.pk):
+            data, status_code, cache_status = await view(request, *args, **kwargs)
+        response = JsonResponse(data, status=status_code, encoder=JSONEncoder)  # Same rendering as DRF's JSONRenderer
+        response["X-Cache"] = cache_status
+        return response
+    return wrapper
+
+
+@async_api_view
+@acached_per_user()
+async def summary(request):
+    totals = await rollups.atotals_by_type(request.user)
+    return {
+        "total_income": totals["income"],
+        "total_expense": totals["expense"],
+        "balance": totals["income"] - totals["expense"],
+    }, 200
+
+
+@async_api_view
+@acached_per_user(vary_on=current_month_key)
+async def budget(request):
+    month = rollups.month_start(datetime.now().date())
+    budget_obj = await Budget.objects.filter(user=request.user, month=month).afirst()
+    if not budget_obj:
+        return {"message": "No budget set for this month."}, 404
+    totals = await rollups.atotals_by_type(request.user, month=month)
+    return {
+        "budget": float(budget_obj.amount),
+        "expenses": float(totals["expense"]),
+        "remaining": float(budget_obj.amount) - float(totals["expense"]),
+    }, 200
+
+
+@async_api_view
+@acached_per_user()
+async def budget_summary(request, month):
+    try:
+        start = analytics.parse_month(month)
+    except ValueError:
+        return {"error": "Invalid month format. Use YYYY-MM."}, 400
+
+    budget_obj = await Budget.objects.filter(user=request.user, month=start).afirst()
+    totals = await rollups.atotals_by_type(request.user, month=start)
+    budget_amount = budget_obj.amount if budget_obj else 0
+    total_expenses = totals["expense"]
+    return {
+        "month": f"{start:%Y-%m}",
+        "budget": float(budget_amount),
+        "total_expenses": float(total_expenses),
+        "remaining_budget": float(budget_amount - total_expenses),
+        "over_budget": total_expenses > budget_amount,
+    }, 200
+
+
+@async_api_view
+@acached_per_user(vary_on=current_month_key)  # Without ?to= the window ends at the current month
+async def timeseries(request):
+    group_by = request.GET.get("group_by", "type")
+    if group_by not in ("type", "category"):
+        return {"error": "group_by must be 'type' or 'category'."}, 400
+    try:
+        end = analytics.parse_month(request.GET.get("to") or datetime.now().strftime("%Y-%m"))
+        start = analytics.parse_month(request.GET["from"]) if request.GET.get("from") else analytics.add_months(end, -11)
+    except ValueError:
+        return {"error": "Invalid month format. Use YYYY-MM."}, 400
+    if start > end or len(analytics.month_range(start, end)) > analytics.MAX_MONTHS:
+        return {"error": f"'from' must not be after 'to' and the range is limited to {analytics.MAX_MONTHS} months."}, 400
+
+    return await analytics.atimeseries(request.user, start, end, group_by), 200
+
+
+@csrf_exempt
+async def login(request):
+    """Same contract as UserLoginView; the user lookup is async and the hashing happens off the event loop."""
+    if request.method != "POST":
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"detail": "JSON parse error."}, status=400)
+    credentials = LoginCredentialsSerializer(data=payload)
+    if not credentials.is_valid():
+        return JsonResponse(credentials.errors, status=400)
+    email, password = credentials.validated_data["email"], credentials.validated_data["password"]
+
+    user = await users_with_email(email).afirst()
+    if user is None:
+        await hash_off_thread(password)  # Unknown emails take as long as wrong passwords
+        return JsonResponse({"non_field_errors": ["Invalid credentials"]}, status=400)
+    matches, upgraded = await verify_off_thread(password, user.password)
+    if not matches:
+        return JsonResponse({"non_field_errors": ["Invalid credentials"]}, status=400)
+    if upgraded:
+        user.password = upgraded
+        await user.asave(update_fields=["password"])
+
+    response = JsonResponse({
+        "message": "Login successful",
+        "user": {"id": user.id, "username": user.username, "email": user.email},
+    })
+    refresh = await sync_to_async(RefreshToken.for_user)(user)  # Records an OutstandingToken for the blacklist app
+    return set_auth_cookies(response, refresh)
@@ -0,0 +1,92 @@
+"""Helpers shared by the bench and loadtest management commands."""
+import json
+import statistics
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+SCAN_NODE_SUFFIX = "Scan"
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, round(fraction * len(samples)) - 1))
+    return samples[index]
+
+
+def summarize(latencies_ms):
+    latencies_ms = sorted(latencies_ms)
+    return {
+        "p50_ms": round(percentile(latencies_ms, 0.50), 3),
+        "p95_ms": round(percentile(latencies_ms, 0.95), 3),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 3),
+        "mean_ms": round(statistics.fmean(latencies_ms), 3) if latencies_ms else 0.0,
+    }
+
+
+def _rows_scanned(plan):
+    """Sum actual rows read by every scan node of an EXPLAIN (ANALYZE, FORMAT JSON) plan."""
+    total = 0
+    if plan.get("Node Type", "").endswith(SCAN_NODE_SUFFIX):
+        total += int(plan.get("Actual Rows", 0) * plan.get("Actual Loops", 1))
+        total += int(plan.get("Rows Removed by Filter", 0) * plan.get("Actual Loops", 1))
+    for child in plan.get("Plans", ()):
+        total += _rows_scanned(child)
+    return total
+
+
+def rows_scanned(statements):
+    """Rows read by the SELECTs in `statements`, on PostgreSQL only (None elsewhere)."""
+    if connection.vendor != "postgresql":
+        return None
+    total = 0
+    with connection.cursor() as cursor:
+        for sql in statements:
+            if not sql.lstrip().upper().startswith("SELECT"):
+                continue
+            cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            total += _rows_scanned(plan[0]["Plan"])
+    return total
+
+
+def time_calls(call, iterations):
+    """Latency summary of calling call() `iterations` times."""
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return summarize(latencies)
+
+
+def measure(send, iterations, before_each=None):
+    """Call send() repeatedly; returns latency summary, query count and rows scanned of one call."""
+    latencies, response = [], None
+    for _ in range(iterations):
+        if before_each is not None:
+            before_each()
+        started = time.perf_counter()
+        response = send()
+        if getattr(response, "streaming", False):
+            b"".join(response.streaming_content)  # Include the time to produce the body
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    if before_each is not None:
+        before_each()
+    with CaptureQueriesContext(connection) as queries:
+        response = send()
+        if getattr(response, "streaming", False):
+            b"".join(response.streaming_content)
+    statements = [query["sql"] for query in queries.captured_queries]
+    return {
+        "status": response.status_code,
+        "queries": len(statements),
+        "rows_scanned": rows_scanned(statements),
+        **summarize(latencies),
+    }
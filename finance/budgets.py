@@ -0,0 +1,158 @@
+"""Budget evaluation for every user at once, for nightly jobs such as over-budget notifications."""
+import json
+import sys
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db.models import FilteredRelation, Q, Sum
+from django.utils.module_loading import import_string
+
+from . import fx
+from .models import Budget, BudgetAlert, MonthlyRollup
+
+ZERO = Decimal("0.00")
+BudgetStatus = namedtuple("BudgetStatus", "user_id month budget spent remaining over_budget")
+
+
+def evaluate(month, chunk_size=10000, using=None):
+    """Yield lists of BudgetStatus, one per user with a budget for `month` (a first-of-month date).
+
+    A single query joins each budget to that month's expense rollups and sums them in the user's
+    currency, read through a server-side cursor; nothing is loaded per user.
+    """
+    rows = (
+        Budget.objects.using(using)
+        .filter(month=month)
+        .alias(expenses=FilteredRelation(
+            "user__monthlyrollup",
+            condition=Q(user__monthlyrollup__month=month, user__monthlyrollup__transaction_type="expense"),
+        ))
+        .annotate(spent=Sum(fx.converted("expenses__total", currency="expenses__currency", month="expenses__month")))
+        .order_by("user_id")
+        .values_list("user_id", "amount", "spent")
+        .iterator(chunk_size=chunk_size)
+    )
+    chunk = []
+    for user_id, budget, spent in rows:
+        spent = (spent or ZERO).quantize(ZERO)  # None when there are no expenses; SQLite sums come back unscaled
+        chunk.append(BudgetStatus(user_id, month, budget, spent, budget - spent, spent > budget))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def for_months(user, months):
+    """BudgetStatus for each of `months` (first-of-month dates), in the order given.
+
+    Two queries for any number of months: the budgets, and the expense rollups grouped by month.
+    A month without a budget counts as a budget of 0, like /budget-summary/.
+    """
+    months = list(dict.fromkeys(months))
+    amounts = dict(Budget.objects.filter(user=user, month__in=months).values_list("month", "amount"))
+    spent = dict(
+        MonthlyRollup.objects.filter(user=user, month__in=months, transaction_type="expense")
+        .values("month").annotate(total=Sum(fx.converted("total"))).order_by()
+        .values_list("month", "total")
+    )
+    statuses = []
+    for month in months:
+        budget = amounts.get(month, ZERO)
+        month_spent = (spent.get(month) or ZERO).quantize(ZERO)
+        statuses.append(BudgetStatus(user.pk, month, budget, month_spent, budget - month_spent, month_spent > budget))
+    return statuses
+
+
+class JSONLinesSink:
+    """Writes one JSON object per evaluated budget to a file path, "-" for stdout, or an open text stream."""
+    takes_target = True
+
+    def __init__(self, target="-", only_over_budget=False):
+        self.only_over_budget = only_over_budget
+        self.owns_file = isinstance(target, str) and target != "-"
+        if self.owns_file:
+            self.file = open(target, "w", encoding="utf-8")
+        else:
+            self.file = sys.stdout if target == "-" else target
+        self.written = 0
+
+    def write(self, statuses):
+        lines = []
+        for status in statuses:
+            if self.only_over_budget and not status.over_budget:
+                continue
+            lines.append(json.dumps({
+                "user_id": status.user_id,
+                "month": f"{status.month:%Y-%m}",
+                "budget": str(status.budget),
+                "spent": str(status.spent),
+                "remaining": str(status.remaining),
+                "over_budget": status.over_budget,
+            }, separators=(",", ":")) + "\n")
+        if lines:
+            self.file.write("".join(lines))
+        self.written += len(lines)
+
+    def close(self):
+        if self.owns_file:
+            self.file.close()
+
+
+class OutboxSink:
+    """Queues a BudgetAlert per over-budget user; re-runs skip users already queued for the month.
+
+    Only over-budget users are ever queued, so `only_over_budget` is accepted for a uniform signature.
+    """
+    takes_target = False
+
+    def __init__(self, only_over_budget=True):
+        self.written = 0
+
+    def write(self, statuses):
+        alerts = [
+            BudgetAlert(user_id=status.user_id, month=status.month, budget=status.budget, spent=status.spent)
+            for status in statuses if status.over_budget
+        ]
+        BudgetAlert.objects.bulk_create(alerts, ignore_conflicts=True)
+        self.written += len(alerts)
+
+    def close(self):
+        pass
+
+
+SINKS = {
+    "jsonl": JSONLinesSink,
+    "outbox": OutboxSink,
+}
+
+
+def get_sink(name, target=None, only_over_budget=False, stdout=None):
+    """Build a sink by name, or from a dotted path to any class with write(statuses) and close().
+
+    A sink whose `takes_target` is true writes to `stdout` when `target` is missing or "-";
+    one whose `takes_target` is False rejects a target with ValueError. Other sinks only get
+    a target when one is given.
+    """
+    sink_class = SINKS.get(name) or import_string(name)
+    takes_target = getattr(sink_class, "takes_target", None)
+    if takes_target is False and target is not None:
+        raise ValueError(f"The {name} sink takes no output target.")
+    if takes_target and target in (None, "-") and stdout is not None:
+        target = stdout
+    options = {"only_over_budget": only_over_budget}
+    if target is not None:
+        options["target"] = target
+    return sink_class(**options)
+
+
+def run(month, sink, chunk_size=10000, using=None):
+    """Evaluate every budget for `month` into `sink`; returns the number of budgets evaluated."""
+    evaluated = 0
+    try:
+        for chunk in evaluate(month, chunk_size=chunk_size, using=using):
+            sink.write(chunk)
+            evaluated += len(chunk)
+    finally:
+        sink.close()
+    return evaluated
@@ -0,0 +1,113 @@
+"""Set-based clean-up of a user's transactions: recategorize, delete by filter, merge categories.
+
+Each operation is one UPDATE or DELETE per tier (hot and archived) inside one DB transaction,
+instead of a request per row. The matching rows are locked first (SELECT ... FOR UPDATE), so
+none of them can be edited or removed before the write; they are then summed per rollup key in
+one grouped query per tier, which gives the rollup deltas without loading the rows. A row that
+starts matching in between (inserted, or edited into the filter) makes the UPDATE or DELETE
+report a different row count, and everything is rolled back.
+
+No per-row signals are sent: the rollups are corrected from the grouped sums, each affected
+user is notified once, and the SQLite search index follows through its triggers.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+
+from . import rollups
+from .models import ArchivedTransaction, CategoryRule, Transaction
+from .signals import delete_quietly, user_data_changed
+
+
+class ConcurrentChange(Exception):
+    """The matching rows changed while the operation ran; nothing was written."""
+
+
+def _lock(queryset):
+    """Lock the matching rows until the end of the DB transaction; FOR UPDATE can't be combined with GROUP BY."""
+    list(queryset.select_for_update(of=("self",)).values_list("id", flat=True))
+
+
+def _grouped(queryset):
+    groups = list(rollups.grouped_by_month(queryset))
+    return groups, sum(group["count"] for group in groups)
+
+
+def _check(written, expected):
+    if written != expected:
+        raise ConcurrentChange("Transactions changed during the operation; try again.")
+
+
+def _apply(groups, target=None):
+    """Take the grouped rows out of their rollups and, given a target category, add them to its rollups."""
+    deltas = defaultdict(lambda: [Decimal("0"), 0])
+    for group in groups:
+        key = tuple(group[name] for name in rollups.ROLLUP_KEY)
+        total = group["total"].quantize(rollups.CENT)  # SQLite sums come back unscaled
+        removed = deltas[key]
+        removed[0] -= total
+        removed[1] -= group["count"]
+        if target is not None:
+            added = deltas[key[:3] + (target.id,) + key[4:]]
+            added[0] += total
+            added[1] += group["count"]
+    rollups.apply_deltas({key: tuple(value) for key, value in deltas.items()})
+    for user_id in {group["user_id"] for group in groups}:
+        user_data_changed(user_id)
+
+
+def recategorize(querysets, target):
+    """Move every transaction in `querysets` (one per tier) to the `target` category.
+
+    Raises ValueError when a matching transaction's type differs from the category's.
+    Returns the number of transactions moved.
+    """
+    querysets = [queryset.exclude(category=target) for queryset in querysets]
+    moved, groups = 0, []
+    with transaction.atomic():
+        for queryset in querysets:
+            _lock(queryset)
+        if any(queryset.exclude(transaction_type=target.category_type).exists() for queryset in querysets):
+            raise ValueError(f"Some matching transactions are not of type '{target.category_type}'.")
+        for queryset in querysets:
+            tier_groups, expected = _grouped(queryset)
+            _check(queryset.update(category=target), expected)
+            moved += expected
+            groups += tier_groups
+        _apply(groups, target)
+    return moved
+
+
+def delete(querysets):
+    """Delete every transaction in `querysets` (one per tier). Returns the number deleted."""
+    deleted, groups = 0, []
+    with transaction.atomic():
+        for queryset in querysets:
+            _lock(queryset)
+            tier_groups, expected = _grouped(queryset)
+            _check(delete_quietly(queryset), expected)
+            deleted += expected
+            groups += tier_groups
+        _apply(groups)
+    return deleted
+
+
+def merge(source, target):
+    """Move all of `source`'s transactions (both tiers) and import rules to `target`, then delete `source`.
+
+    Both categories must belong to the same user and have the same type. Returns the number of
+    transactions moved.
+    """
+    if source.user_id != target.user_id or source.pk == target.pk:
+        raise ValueError("Merge into another category of your own.")
+    if source.category_type != target.category_type:
+        raise ValueError(f"Both categories must be of type '{source.category_type}'.")
+    with transaction.atomic():
+        moved = recategorize(
+            [model.objects.filter(user_id=source.user_id, category=source) for model in (Transaction, ArchivedTransaction)],
+            target,
+        )
+        CategoryRule.objects.filter(category=source).update(category=target)
+        source.delete()  # Only its emptied rollup rows are left to cascade
+    return moved
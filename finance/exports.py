@@ -0,0 +1,70 @@
+import csv
+import heapq
+import json
+
+EXPORT_FIELDS = ("id", "date", "transaction_type", "category_id", "category__name", "amount", "description", "currency")
+EXPORT_HEADER = ("id", "date", "type", "category_id", "category", "amount", "description", "currency")
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class _Echo:
+    """File-like object whose write() hands the line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(*querysets, chunk_size=2000):
+    """Iterate plain tuples through server-side cursors, oldest first.
+
+    Several querysets (hot and archived transactions) are read side by side and merged.
+    """
+    cursors = [
+        queryset.order_by("date", "id").values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+        for queryset in querysets
+    ]
+    if len(cursors) == 1:
+        return cursors[0]
+    return heapq.merge(*cursors, key=lambda row: (row[1], row[0]))
+
+
+def _batched(lines, batch_size):
+    # One yield per few hundred rows keeps the per-chunk overhead of the WSGI server low
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(rows):
+    encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+    for pk, day, transaction_type, category_id, category, amount, description, currency in rows:
+        yield encode({
+            "id": pk,
+            "date": day.isoformat(),
+            "type": transaction_type,
+            "category_id": category_id,
+            "category": category,
+            "amount": str(amount),
+            "description": description,
+            "currency": currency,
+        }) + "\n"
+
+
+def stream(rows, file_type, batch_size=500):
+    lines = csv_lines(rows) if file_type == "csv" else ndjson_lines(rows)
+    return _batched(lines, batch_size)
@@ -0,0 +1,78 @@
+"""Read-only serialization straight from values_list tuples.
+
+Produces exactly what TransactionSerializer / CategorySerializer would for
+reads, without building model instances or serializer field objects per row.
+"""
+from django.db.models import CharField, F, Func
+
+from .models import Transaction
+
+# API field name -> database column
+TRANSACTION_COLUMNS = {
+    "id": "id",
+    "user": "user_id",
+    "category": "category_id",
+    "amount": "amount",
+    "currency": "currency",
+    "transaction_type": "transaction_type",
+    "description": "description",
+    "date": "date",
+}
+CATEGORY_FIELDS = ("id", "name", "category_type")
+
+
+class DecimalText(Func):
+    """A decimal column as fixed-point text ("12.50"), the way DRF's DecimalField shows it."""
+    output_field = CharField()
+
+    def __init__(self, expression, decimal_places):
+        super().__init__(expression)
+        self.decimal_places = decimal_places
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template="CAST(%(expressions)s AS TEXT)", **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # SQLite keeps decimals as REAL; printf rounds them back to the column's scale
+        template = f"printf('%%%%.{self.decimal_places}f', %(expressions)s)"  # %% survives both formatting passes
+        return super().as_sql(compiler, connection, template=template, **extra_context)
+
+
+class DateText(Func):
+    """A date column as ISO 8601 text, the way DRF's DateField shows it."""
+    output_field = CharField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template="CAST(%(expressions)s AS TEXT)", **extra_context)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template="to_char(%(expressions)s, 'YYYY-MM-DD')", **extra_context)
+
+
+# Columns the database formats as text, so no row goes through Decimal or date converters
+_TEXT_COLUMNS = {
+    "amount": lambda: DecimalText("amount", Transaction._meta.get_field("amount").decimal_places),
+    "date": lambda: DateText("date"),
+}
+
+
+def transaction_rows(queryset, fields, key="date", ranked=False):
+    """values_list over the requested fields, always ending in (key, id) for the pagination cursor.
+
+    Requested amounts and dates come back as the API's strings; the cursor columns keep their
+    types and are named cursor_key and cursor_id, which is what a union of these has to order by.
+    With `ranked`, search results (see finance.search) also carry their rank just before them.
+    """
+    columns = [_TEXT_COLUMNS[name]() if name in _TEXT_COLUMNS else TRANSACTION_COLUMNS[name] for name in fields]
+    ranking = ["rank"] if ranked else []
+    return queryset.annotate(cursor_key=F(key), cursor_id=F("id")).values_list(*columns, *ranking, "cursor_key", "cursor_id")
+
+
+def encode_transactions(rows, fields):
+    """Turn transaction_rows() tuples into the dicts TransactionSerializer(many=True).data would give."""
+    fields = tuple(fields)
+    return [dict(zip(fields, row)) for row in rows]  # zip stops before the trailing (key, id) cursor columns
+
+
+def encode_categories(queryset):
+    return [dict(zip(CATEGORY_FIELDS, row)) for row in queryset.values_list(*CATEGORY_FIELDS)]
@@ -0,0 +1,69 @@
+"""Query-string filters for transaction reads.
+
+Every read is scoped to one user, so each supported filter is served by a composite index in
+Transaction.Meta that leads with user:
+
+    ?date_from= / ?date_to=        (user, date, id)
+    ?type=                         (user, transaction_type, date, id)
+    ?category=1,2                  (user, category, date, id)
+    ?amount_min= / ?amount_max=    (user, amount, id)
+
+The list endpoint's ?ordering= (see TransactionCursorPagination) uses the same indexes: date
+orderings walk (user, date, id) and amount orderings walk (user, amount, id).
+"""
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from rest_framework.exceptions import ValidationError
+
+from .models import Transaction
+
+MAX_CATEGORIES = 50  # Upper bound for one ?category= list
+PARAMS = ("date_from", "date_to", "type", "category", "amount_min", "amount_max")
+
+
+def parse_amount(raw, name):
+    try:
+        amount = Decimal(raw)
+    except InvalidOperation:
+        raise ValidationError({name: "Use a decimal amount such as 12.50."})
+    if not amount.is_finite():
+        raise ValidationError({name: "Use a decimal amount such as 12.50."})
+    return amount
+
+
+def parse_categories(raw):
+    try:
+        ids = {int(part) for part in raw.split(",") if part.strip()}
+    except ValueError:
+        raise ValidationError({"category": "Use a comma separated list of category ids."})
+    if len(ids) > MAX_CATEGORIES:
+        raise ValidationError({"category": f"Filter on at most {MAX_CATEGORIES} categories."})
+    return ids
+
+
+def filter_transactions(queryset, params):
+    """Apply the optional ?date_from=, ?date_to= (YYYY-MM-DD, inclusive), ?type=, ?category=
+    and ?amount_min= / ?amount_max= (inclusive) filters."""
+    try:
+        if params.get("date_from"):
+            queryset = queryset.filter(date__gte=date.fromisoformat(params["date_from"]))
+        if params.get("date_to"):
+            queryset = queryset.filter(date__lte=date.fromisoformat(params["date_to"]))
+    except ValueError:
+        raise ValidationError({"date": "Use YYYY-MM-DD dates."})
+
+    transaction_type = params.get("type")
+    if transaction_type:
+        if transaction_type not in dict(Transaction.TRANSACTION_TYPES):
+            raise ValidationError({"type": "Use 'income' or 'expense'."})
+        queryset = queryset.filter(transaction_type=transaction_type)
+
+    if params.get("category"):
+        queryset = queryset.filter(category_id__in=parse_categories(params["category"]))
+
+    if params.get("amount_min"):
+        queryset = queryset.filter(amount__gte=parse_amount(params["amount_min"], "amount_min"))
+    if params.get("amount_max"):
+        queryset = queryset.filter(amount__lte=parse_amount(params["amount_max"], "amount_max"))
+    return queryset
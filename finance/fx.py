@@ -0,0 +1,177 @@
+"""Currencies: the daily rate table, its in-process copy, and conversion inside aggregate queries.
+
+FxRate holds daily rates quoted in settings.FX_BASE_CURRENCY, loaded from a CSV file by
+`load_fx_rates`. An amount in currency C is shown in its owner's home currency H as
+
+    amount * rate(C) / rate(H)
+
+with both rates taken as of the first day of the amount's month: the latest rate on or
+before that day, or the earliest rate when the table starts later. Converting per month
+means the monthly rollups (which total each currency separately) convert to exactly the
+same figures as the raw transactions they summarize.
+
+converted() builds that as a SQL expression, so aggregates convert every row in the
+database. The in-process RateTable answers single lookups (such as validating a write)
+without a query. A home currency must have rates (see has_rates), or every foreign amount
+would convert to NULL and drop out of its owner's totals.
+"""
+import bisect
+import csv
+import threading
+import time
+import uuid
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import Exact
+
+from .models import FxRate, UserProfile
+
+RATES_VERSION_KEY = "fx-rates:version"
+AMOUNT = DecimalField(max_digits=20, decimal_places=2)
+RATE = DecimalField(max_digits=18, decimal_places=8)
+
+
+def home_currency(user):
+    """The currency a user's totals are shown in (one query)."""
+    currency = UserProfile.objects.filter(user=user).values_list("currency", flat=True).first()
+    return (currency or settings.DEFAULT_CURRENCY)[:3].upper()
+
+
+def has_rates(currency):
+    """Whether amounts can be converted to or from `currency` (one query unless it's the base)."""
+    return currency == settings.FX_BASE_CURRENCY or FxRate.objects.filter(currency=currency).exists()
+
+
+def _rate(currency, outer_currency, outer_month):
+    """SQL: value of one `currency` unit in the base currency as of the month.
+
+    `currency` is an expression of the query being aggregated; outer_currency and
+    outer_month are the same values as OuterRefs, for the FxRate subqueries.
+    """
+    rates = FxRate.objects.filter(currency=outer_currency)
+    return Case(
+        When(Exact(currency, Value(settings.FX_BASE_CURRENCY)), then=Value(Decimal(1))),
+        default=Coalesce(
+            Subquery(rates.filter(date__lte=outer_month).order_by("-date").values("rate")[:1]),
+            Subquery(rates.order_by("date").values("rate")[:1]),
+        ),
+        output_field=RATE,
+    )
+
+
+def converted(amount, currency="currency", month="month", profile="user__profile"):
+    """SQL: the `amount` field in its owner's home currency, for use inside Sum().
+
+    Field names are relative to the rows being aggregated; `month` must be a first-of-month
+    date (annotate TruncMonth("date") on raw transactions) and `profile` leads to the
+    owner's UserProfile. Rows already in the home currency skip the rate lookups, which use
+    the FxRate (currency, date) index.
+    """
+    home = Coalesce(F(f"{profile}__currency"), Value(settings.DEFAULT_CURRENCY))
+    outer_home = Coalesce(OuterRef(f"{profile}__currency"), Value(settings.DEFAULT_CURRENCY))
+    factor = (
+        _rate(F(currency), OuterRef(currency), OuterRef(month))
+        / _rate(home, outer_home, OuterRef(month))
+    )
+    return Case(
+        When(Exact(F(currency), home), then=F(amount)),
+        default=ExpressionWrapper(F(amount) * factor, output_field=AMOUNT),
+        output_field=AMOUNT,
+    )
+
+
+class RateTable:
+    """In-process copy of FxRate: per currency, its dates sorted with their rates.
+
+    Lookups reload it after `ttl` seconds. sync() also reloads it when the shared RATES_VERSION_KEY
+    has changed (load_rows bumps it); writers call it once per request or batch, not per lookup.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._rates = {}  # currency -> (sorted dates, rates)
+        self._version = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def rate(self, currency, day):
+        """Value of one `currency` unit in the base currency as of `day`, or None if it has no rates."""
+        if currency == settings.FX_BASE_CURRENCY:
+            return Decimal(1)
+        if self._is_stale():
+            self.sync()
+        dates, rates = self._rates.get(currency, ((), ()))
+        if not dates:
+            return None
+        index = bisect.bisect_right(dates, day)
+        return rates[index - 1] if index else rates[0]
+
+    def sync(self):
+        """Reload the table if it has expired or load_rows has run since (one shared-cache get)."""
+        version = cache.get(RATES_VERSION_KEY)
+        if not self._is_stale() and version == self._version:
+            return
+        with self._lock:
+            loaded = {}
+            for currency, day, rate in FxRate.objects.order_by("currency", "date").values_list("currency", "date", "rate"):
+                dates, rates = loaded.setdefault(currency, ([], []))
+                dates.append(day)
+                rates.append(rate)
+            self._rates, self._version, self._loaded_at = loaded, version, time.monotonic()
+
+    def _is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    def clear(self):
+        with self._lock:
+            self._rates, self._version, self._loaded_at = {}, None, None
+
+
+rates = RateTable(ttl=getattr(settings, "FX_RATES_TTL", 300))
+
+
+def parse_rates(lines):
+    """Yield FxRate objects from CSV lines with a date,currency,rate header; raises ValueError."""
+    for number, row in enumerate(csv.DictReader(lines), start=2):
+        try:
+            currency = row["currency"].strip().upper()
+            if len(currency) != 3 or not currency.isalpha():
+                raise ValueError(f"bad currency code {row['currency']!r}")
+            rate = Decimal(row["rate"].strip())
+            if not rate.is_finite() or rate <= 0:
+                raise ValueError(f"bad rate {row['rate']!r}")
+            yield FxRate(currency=currency, date=date.fromisoformat(row["date"].strip()), rate=rate)
+        except (KeyError, AttributeError, InvalidOperation, ValueError) as exc:
+            raise ValueError(f"Line {number}: {exc}") from None
+
+
+def load_rows(rows, batch_size=5000):
+    """Insert or update FxRate rows in batches; every worker reloads its RateTable afterwards.
+
+    The new RATES_VERSION_KEY is also part of every cached response's version and ETag.
+    """
+    written = 0
+    batch = []
+    with transaction.atomic():
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                written += _upsert(batch)
+                batch = []
+        if batch:
+            written += _upsert(batch)
+        transaction.on_commit(lambda: cache.set(RATES_VERSION_KEY, uuid.uuid4().hex, None))
+    return written
+
+
+def _upsert(batch):
+    FxRate.objects.bulk_create(
+        batch, update_conflicts=True, unique_fields=["currency", "date"], update_fields=["rate"],
+    )
+    return len(batch)
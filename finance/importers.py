@@ -0,0 +1,264 @@
+import csv
+import hashlib
+import re
+import time
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+
+from . import fx, rollups
+from .models import ArchivedTransaction, Category, CategoryRule, Transaction
+from .signals import user_data_changed
+
+# Day/month order is a per-statement choice: 04/05/2025 is 4 May in a "dmy" statement and
+# 5 April in an "mdy" one, so no row is ever guessed both ways
+DATE_FORMATS = {
+    "dmy": ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y%m%d"),
+    "mdy": ("%Y-%m-%d", "%m/%d/%Y", "%m-%d-%Y", "%Y%m%d"),
+}
+INCOME_WORDS = {"income", "credit", "cr", "deposit"}
+EXPENSE_WORDS = {"expense", "debit", "dr", "withdrawal", "payment"}
+MAX_REPORTED_ERRORS = 50
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+class RowError(ValueError):
+    """A statement row that can't be turned into a transaction."""
+
+
+def iter_csv(stream):
+    """Yield (line number, row) from a CSV statement, one row at a time.
+
+    Header names are matched case-insensitively; recognised columns are
+    date, amount, description, type, category and reference.
+    """
+    reader = csv.DictReader(stream)
+    try:
+        for row in reader:
+            yield reader.line_num, {
+                (key or "").strip().lower(): (value or "").strip()
+                for key, value in row.items()
+                if isinstance(value, str)
+            }
+    except csv.Error as exc:
+        raise ValueError(f"Malformed CSV at line {reader.line_num}: {exc}") from None
+
+
+def iter_ofx(stream, chunk_size=64 * 1024):
+    """Yield (ordinal, row) for every <STMTTRN> in an OFX/QFX statement.
+
+    Reads fixed-size chunks rather than lines, since some banks put the whole
+    file on a single line. Works for both SGML (OFX 1.x) and XML (OFX 2.x).
+    """
+    buffer, current, ordinal = "", None, 0
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        # Only tokenise up to the last "<"; the tag after it may continue in the next chunk
+        cut = len(buffer) if not chunk else max(buffer.rfind("<"), 0)
+        head, buffer = buffer[:cut], buffer[cut:]
+        for closing, tag, value in _OFX_TAG.findall(head):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and current is not None:
+                    ordinal += 1
+                    yield ordinal, {
+                        "date": current.get("DTPOSTED", "")[:8],
+                        "amount": current.get("TRNAMT", ""),
+                        "description": current.get("NAME") or current.get("MEMO", ""),
+                        "reference": current.get("FITID", ""),
+                    }
+                current = None if closing else {}
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+        if not chunk:
+            break
+
+
+def parse_date(value, date_order="dmy"):
+    for date_format in DATE_FORMATS[date_order]:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise RowError(f"Unrecognised date {value!r}.")
+
+
+def parse_amount(value):
+    cleaned = re.sub(r"[^0-9.\-]", "", value.replace("(", "-"))  # Drop currency symbols and thousands separators
+    try:
+        return Decimal(cleaned).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise RowError(f"Unrecognised amount {value!r}.")
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.errors = []  # First MAX_REPORTED_ERRORS (row, message) pairs
+        self.seconds = 0.0
+
+    @property
+    def rows(self):
+        return self.imported + self.duplicates + self.rejected
+
+    @property
+    def rows_per_second(self):
+        return round(self.rows / self.seconds, 1) if self.seconds else float(self.rows)
+
+    def reject(self, row_number, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": self.rows_per_second,
+            "errors": self.errors,
+        }
+
+
+class StatementImporter:
+    """Streams statement rows into Transaction rows for one user.
+
+    The user's category rules and categories are loaded once up front; rows
+    are inserted in chunks, and rows whose import key already exists are
+    skipped, so re-importing an overlapping statement is safe.
+    """
+
+    def __init__(self, user, chunk_size=2000, date_order="dmy"):
+        if date_order not in DATE_FORMATS:
+            raise ValueError(f"Unsupported date order {date_order!r}; use one of {', '.join(DATE_FORMATS)}.")
+        self.user = user
+        self.chunk_size = chunk_size
+        self.date_order = date_order
+        categories = list(Category.objects.filter(user=user))
+        by_id = {category.id: category for category in categories}
+        self.categories_by_name = {category.name.lower(): category for category in categories}
+        self.rules = [
+            (pattern.lower(), by_id[category_id])
+            for pattern, category_id in CategoryRule.objects.filter(user=user)
+            .order_by("-priority", "id")
+            .values_list("pattern", "category_id")
+        ]
+        self.currency = fx.home_currency(user)  # Statements are in the user's own currency
+        self._seen = Counter()
+
+    def run(self, rows):
+        result = ImportResult()
+        started = time.monotonic()
+        pending = []
+        for row_number, row in rows:
+            try:
+                pending.append(self.build(row))
+            except RowError as exc:
+                result.reject(row_number, str(exc))
+                continue
+            if len(pending) >= self.chunk_size:
+                self.flush(pending, result)
+                pending = []
+        if pending:
+            self.flush(pending, result)
+        result.seconds = time.monotonic() - started
+        return result
+
+    def build(self, row):
+        day = parse_date(row.get("date", ""), self.date_order)
+        amount = parse_amount(row.get("amount", ""))
+        description = row.get("description", "")
+
+        kind = row.get("type", "").lower()
+        if kind in INCOME_WORDS:
+            transaction_type = "income"
+        elif kind in EXPENSE_WORDS:
+            transaction_type = "expense"
+        elif kind:
+            raise RowError(f"Unrecognised type {row['type']!r}.")
+        else:
+            transaction_type = "expense" if amount < 0 else "income"  # Signed statement amounts
+
+        category = self.match_category(description, row.get("category", ""))
+        if category is None:
+            raise RowError(f"No category rule matches {description!r}.")
+        if category.category_type != transaction_type:
+            raise RowError(f"Category {category.name!r} is not an {transaction_type} category.")
+
+        return Transaction(
+            user=self.user,
+            category=category,
+            amount=abs(amount),
+            currency=self.currency,
+            transaction_type=transaction_type,
+            description=description or None,
+            date=day,
+            import_key=self.import_key(row.get("reference", ""), day, amount, description),
+        )
+
+    def match_category(self, description, category_name):
+        lowered = description.lower()
+        for pattern, category in self.rules:
+            if pattern in lowered:
+                return category
+        return self.categories_by_name.get(category_name.lower())
+
+    def import_key(self, reference, day, amount, description):
+        if reference:
+            return hashlib.sha256(f"ref|{reference}".encode()).hexdigest()
+        # Without a bank reference, identical rows in one statement are told apart by their occurrence number
+        digest = hashlib.sha256(f"{day}|{amount}|{description}".encode()).digest()
+        self._seen[digest] += 1
+        return hashlib.sha256(digest + f"|{self._seen[digest]}".encode()).hexdigest()
+
+    def flush(self, pending, result):
+        try:
+            fresh = self.insert_new(pending)
+        except IntegrityError:
+            # A concurrent import of the same statement committed some of these keys after we
+            # looked them up; the atomic block rolled back, so look again and insert the rest
+            fresh = self.insert_new(pending)
+        result.imported += len(fresh)
+        result.duplicates += len(pending) - len(fresh)
+
+    def insert_new(self, pending):
+        keys = [tx.import_key for tx in pending]
+        existing = set(
+            Transaction.objects.filter(user=self.user, import_key__in=keys).values_list("import_key", flat=True)
+        )
+        existing.update(  # Rows imported long ago may have been archived since
+            ArchivedTransaction.objects.filter(user=self.user, import_key__in=keys).values_list("import_key", flat=True)
+        )
+        fresh = []
+        for tx in pending:
+            if tx.import_key in existing:
+                continue
+            existing.add(tx.import_key)  # Also drops repeats of the same bank reference within a chunk
+            fresh.append(tx)
+        with transaction.atomic():
+            Transaction.objects.bulk_create(fresh, batch_size=1000)
+            rollups.record(added=fresh)
+            user_data_changed(self.user.pk)  # bulk_create sends no post_save signals
+        return fresh
+
+
+def detect_format(filename, declared=None):
+    if declared:
+        return declared.lower()
+    return "ofx" if filename.lower().endswith((".ofx", ".qfx")) else "csv"
+
+
+def parse_statement(stream, statement_format):
+    if statement_format == "ofx":
+        return iter_ofx(stream)
+    if statement_format == "csv":
+        return iter_csv(stream)
+    raise ValueError(f"Unsupported statement format {statement_format!r}.")
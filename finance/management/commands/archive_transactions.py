@@ -0,0 +1,45 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from finance import archive
+from finance.analytics import add_months
+
+
+class Command(BaseCommand):
+    help = (
+        "Move transactions older than --older-than months into the archive table, in primary-key "
+        "batches. Archived rows still count in every summary and are still returned by reads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than", type=int, required=True,
+            help="Archive transactions dated before the first day of the month this many months ago.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Primary-key range moved per transaction.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be moved.")
+        parser.add_argument(
+            "--vacuum", action="store_true",
+            help="Afterwards run VACUUM ANALYZE on the transaction table (PostgreSQL) so its freed pages are reused.",
+        )
+
+    def handle(self, *args, **options):
+        if options["older_than"] < 1:
+            raise CommandError("--older-than must be at least 1 month.")
+        cutoff = add_months(date.today().replace(day=1), -options["older_than"])
+
+        moved = archive.archive_before(
+            cutoff,
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+            progress=lambda total: self.stdout.write(f"{total} transactions...") if options["verbosity"] > 1 else None,
+        )
+
+        if options["vacuum"] and not options["dry_run"] and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("VACUUM ANALYZE finance_transaction")
+
+        verb = "Would move" if options["dry_run"] else "Moved"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {moved} transactions dated before {cutoff} to the archive."))
@@ -0,0 +1,193 @@
+import json
+import subprocess
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import URLPattern, URLResolver, reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from finance import benchmarks, urls as finance_urls
+from finance.models import Category, CategoryRule, Transaction
+from spend_wise.utils.authentication import user_cache
+
+
+def iter_patterns(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern
+
+
+def allows_get(callback):
+    if hasattr(callback, "actions"):  # ViewSet routes map HTTP methods to actions
+        return "get" in callback.actions
+    view_class = getattr(callback, "cls", None) or getattr(callback, "view_class", None)
+    if view_class is None:
+        return True  # Plain function views here are the GET-only async views
+    return hasattr(view_class, "get")
+
+
+def in_rollback(send):
+    """Run a writing request inside a transaction that is always rolled back."""
+    def wrapped():
+        with transaction.atomic():
+            response = send()
+            transaction.set_rollback(True)
+        return response
+    return wrapped
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every GET route in finance/urls.py, plus the write routes (single, bulk and statement-import "
+        "creates, update, recategorize, bulk delete and category merge, each rolled back), through the test "
+        "client and report latency percentiles, queries per request and rows scanned (PostgreSQL). "
+        "Run seed_spendwise first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", default="seed_0", help="Seeded user to make the requests as.")
+        parser.add_argument("--password", default="spendwise-bench", help="That user's password (for the login route).")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warm", action="store_true", help="Keep the response cache between requests (default: cleared before each).")
+        parser.add_argument("--only", help="Only run routes whose name contains this text.")
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument("--compare", help="Earlier JSON results to print p95/query deltas against.")
+
+    def handle(self, *args, **options):
+        try:
+            self.user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}; run seed_spendwise first.")
+
+        self.client = Client(HTTP_HOST="localhost")
+        self.client.cookies["access_token"] = str(AccessToken.for_user(self.user))
+        before_each = None if options["warm"] else cache.clear
+
+        results = {}
+        for name, send in self.scenarios(options):
+            if options["only"] and options["only"] not in name:
+                continue
+            user_cache.clear()
+            results[name] = benchmarks.measure(send, options["iterations"], before_each)
+            self.report(name, results[name])
+
+        payload = {
+            "commit": self.git_commit(),
+            "vendor": connection.vendor,
+            "user": self.user.username,
+            "transactions": Transaction.objects.filter(user=self.user).count(),
+            "iterations": options["iterations"],
+            "warm_cache": options["warm"],
+            "routes": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(payload, output, indent=2, sort_keys=True)
+        if options["compare"]:
+            self.compare(options["compare"], results)
+
+    def scenarios(self, options):
+        sample_ids = {
+            "pk": {
+                "category": Category.objects.filter(user=self.user).values_list("id", flat=True).first(),
+                "category-rule": CategoryRule.objects.filter(user=self.user).values_list("id", flat=True).first(),
+                "transaction": Transaction.objects.filter(user=self.user).order_by("-date", "-id").values_list("id", flat=True).first(),
+            },
+        }
+        month = f"{date.today():%Y-%m}"
+
+        seen = set()
+        for pattern in iter_patterns(finance_urls.urlpatterns):
+            if pattern.name in seen or not allows_get(pattern.callback):
+                continue
+            seen.add(pattern.name)
+            kwargs = {}
+            converters = pattern.pattern.regex.groupindex
+            if "format" in converters:
+                continue  # Format-suffix duplicates of router routes
+            if "pk" in converters:
+                pk = sample_ids["pk"].get(pattern.name.rsplit("-", 1)[0])
+                if pk is None:
+                    continue
+                kwargs["pk"] = pk
+            if "month" in converters:
+                kwargs["month"] = month
+            path = reverse(pattern.name, kwargs=kwargs)
+            yield f"GET {pattern.name}", lambda path=path: self.client.get(path, HTTP_ACCEPT="application/json")
+
+        category, other = (list(Category.objects.filter(user=self.user, category_type="expense").order_by("id")[:2]) + [None, None])[:2]
+        item = {"category": category.id if category else 0, "amount": "12.34", "transaction_type": "expense", "date": f"{date.today()}"}
+        statement = "Date,Description,Amount\n" + "".join(f"{date.today()},Bench payee {n},-{n}.99\n" for n in range(100))
+        yield "POST login", lambda: self.client.post(
+            reverse("login"), {"email": self.user.email, "password": options["password"]}, content_type="application/json"
+        )
+        yield "POST transaction-list", in_rollback(
+            lambda: self.client.post(reverse("transaction-list"), item, content_type="application/json")
+        )
+        yield "POST transaction-bulk (100)", in_rollback(
+            lambda: self.client.post(reverse("transaction-bulk"), [item] * 100, content_type="application/json")
+        )
+        if category is not None:
+            def import_statement():
+                # A rule for the payees, so every row is imported; its insert adds one query to the count
+                CategoryRule.objects.create(user=self.user, pattern="Bench payee", category=category)
+                return self.client.post(
+                    reverse("transaction-import-statement"), {"file": SimpleUploadedFile("bench.csv", statement.encode())}
+                )
+            yield "POST transaction-import (100 rows)", in_rollback(import_statement)
+        transaction_id = sample_ids["pk"]["transaction"]
+        if transaction_id is not None:
+            yield "PATCH transaction-detail", in_rollback(
+                lambda: self.client.patch(
+                    reverse("transaction-detail", kwargs={"pk": transaction_id}), {"amount": "1.23"}, content_type="application/json"
+                )
+            )
+        this_month = f"?date_from={date.today().replace(day=1)}"
+        if other is not None:
+            yield "POST transaction-recategorize (this month)", in_rollback(
+                lambda: self.client.post(
+                    reverse("transaction-recategorize") + this_month + "&type=expense", {"category": other.id}, content_type="application/json"
+                )
+            )
+            yield "POST category-merge", in_rollback(
+                lambda: self.client.post(reverse("category-merge", kwargs={"pk": other.id}), {"into": category.id}, content_type="application/json")
+            )
+        yield "POST transaction-bulk-delete (this month)", in_rollback(
+            lambda: self.client.post(reverse("transaction-bulk-delete") + this_month)
+        )
+
+    def report(self, name, stats):
+        rows = "-" if stats["rows_scanned"] is None else stats["rows_scanned"]
+        self.stdout.write(
+            f"{name:<45} {stats['status']:>3}  p50 {stats['p50_ms']:>8.2f}ms  p95 {stats['p95_ms']:>8.2f}ms  "
+            f"p99 {stats['p99_ms']:>8.2f}ms  queries {stats['queries']:>3}  rows {rows}"
+        )
+
+    def compare(self, path, results):
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)["routes"]
+        self.stdout.write(f"\nCompared with {path}:")
+        for name, stats in results.items():
+            old = baseline.get(name)
+            if old is None:
+                continue
+            change = (stats["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+            self.stdout.write(
+                f"{name:<45} p95 {old['p95_ms']:>8.2f} -> {stats['p95_ms']:>8.2f}ms ({change:+.0f}%)  "
+                f"queries {old['queries']} -> {stats['queries']}"
+            )
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,69 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from finance import benchmarks
+from finance.serializers import users_with_email
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login cost: the email lookup (and its query plan), password hashing at one or more "
+        "PASSWORD_HASH_ITERATIONS values, and the login endpoints end to end. Run seed_spendwise first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="seed", help="Seeded username prefix.")
+        parser.add_argument("--password", default="spendwise-bench", help="The seeded users' password.")
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--costs", default="",
+            help="Comma-separated PASSWORD_HASH_ITERATIONS values to time hashing at (default: the current setting).",
+        )
+
+    def handle(self, *args, **options):
+        emails = list(
+            User.objects.filter(username__startswith=f"{options['prefix']}_").values_list("email", flat=True)[:options["iterations"]]
+        )
+        if not emails:
+            raise CommandError(f"No users named {options['prefix']}_*; run seed_spendwise first.")
+
+        lookup = users_with_email(emails[0].upper())
+        self.stdout.write(f"Email lookup plan:\n{lookup.explain()}\n")
+        latencies = []
+        for email in emails:
+            started = time.perf_counter()
+            users_with_email(email.upper()).first()
+            latencies.append((time.perf_counter() - started) * 1000)
+        self.report("email lookup", benchmarks.summarize(latencies))
+
+        costs = [int(cost) for cost in options["costs"].split(",") if cost] or [settings.PASSWORD_HASH_ITERATIONS]
+        for cost in costs:
+            with override_settings(PASSWORD_HASH_ITERATIONS=cost):
+                latencies = []
+                for _ in range(max(3, options["iterations"] // 4)):
+                    started = time.perf_counter()
+                    make_password(options["password"])
+                    latencies.append((time.perf_counter() - started) * 1000)
+            stats = benchmarks.summarize(latencies)
+            self.report(f"hash @ {cost} iterations", stats, f"~{1000 / stats['mean_ms']:.0f} logins/s per core")
+
+        client = Client(HTTP_HOST="localhost")
+        for route in ("login", "async-login"):
+            stats = benchmarks.measure(
+                lambda route=route: client.post(
+                    reverse(route), {"email": emails[0], "password": options["password"]}, content_type="application/json"
+                ),
+                options["iterations"],
+            )
+            self.report(f"POST {route}", stats, f"status {stats['status']}, {stats['queries']} queries")
+
+    def report(self, name, stats, extra=""):
+        self.stdout.write(
+            f"{name:<32} p50 {stats['p50_ms']:>8.2f}ms  p95 {stats['p95_ms']:>8.2f}ms  mean {stats['mean_ms']:>8.2f}ms  {extra}"
+        )
@@ -0,0 +1,42 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from finance import benchmarks, search
+from finance.models import Transaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare description search through the text index with the icontains baseline for one user "
+        "(first page of 50 results, and every match). Run seed_spendwise first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", default="seed_0")
+        parser.add_argument("--query", action="append", dest="queries", help="Search text (repeatable). Defaults to a few merchants.")
+        parser.add_argument("--iterations", type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}; run seed_spendwise first.")
+        transactions = Transaction.objects.filter(user=user)
+        self.stdout.write(f"{transactions.count()} transactions for {user.username}")
+
+        for query in options["queries"] or ["uber", "whole foods", "netf"]:
+            baseline = transactions.filter(
+                *(Q(description__icontains=word) for word in search.terms(query))
+            ).order_by("-date", "-id")
+            indexed = search.search(transactions, query)
+            self.stdout.write(f"\n{query!r}: {len(baseline)} icontains matches, {len(indexed)} indexed matches")
+            for name, queryset in (("icontains", baseline), ("text index", indexed)):
+                for step, call in (
+                    ("first page", lambda: list(queryset.values_list("id", flat=True)[:50])),
+                    ("all matches", lambda: list(queryset.values_list("id", flat=True))),
+                ):
+                    stats = benchmarks.time_calls(call, options["iterations"])
+                    self.stdout.write(
+                        f"  {name:<12} {step:<11} p50 {stats['p50_ms']:>8.2f}ms  p95 {stats['p95_ms']:>8.2f}ms  mean {stats['mean_ms']:>8.2f}ms"
+                    )
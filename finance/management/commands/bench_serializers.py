@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from finance import benchmarks, fast_serializers
+from finance.models import Transaction
+from finance.serializers import TransactionSerializer
+from spend_wise.utils.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the ModelSerializer + JSONRenderer list path with the values_list fast path and "
+        "FastJSONRenderer on one page of transactions. Run seed_spendwise first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", default="seed_0", help="Seeded user whose transactions to serialize.")
+        parser.add_argument("--rows", type=int, default=10000)
+        parser.add_argument("--iterations", type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}; run seed_spendwise first.")
+        queryset = Transaction.objects.filter(user=user).order_by("-date", "-id")[:options["rows"]]
+        fields = TransactionSerializer.Meta.fields
+
+        def model_serializer():
+            return JSONRenderer().render(TransactionSerializer(queryset, many=True).data)
+
+        def fast_path():
+            rows = fast_serializers.transaction_rows(queryset, fields)
+            return FastJSONRenderer().render(fast_serializers.encode_transactions(rows, fields))
+
+        if model_serializer() != JSONRenderer().render(fast_serializers.encode_transactions(
+            fast_serializers.transaction_rows(queryset, fields), fields
+        )):
+            raise CommandError("The fast path's output differs from TransactionSerializer's.")
+
+        results = {}
+        for name, run in (("ModelSerializer + JSONRenderer", model_serializer), ("values_list + FastJSONRenderer", fast_path)):
+            results[name] = benchmarks.time_calls(run, options["iterations"])
+            stats = results[name]
+            self.stdout.write(f"{name:<32} p50 {stats['p50_ms']:>9.2f}ms  p95 {stats['p95_ms']:>9.2f}ms  mean {stats['mean_ms']:>9.2f}ms")
+
+        baseline, fast = (stats["mean_ms"] for stats in results.values())
+        self.stdout.write(self.style.SUCCESS(f"{len(queryset)} rows: {baseline / fast if fast else 0:.1f}x faster"))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from finance import fx
+
+
+class Command(BaseCommand):
+    help = (
+        "Load daily exchange rates from a CSV file with a date,currency,rate header, where rate is the value "
+        "of one unit of the currency in FX_BASE_CURRENCY. Existing (currency, date) rows are updated."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to load.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as rates_file:
+                written = fx.load_rows(fx.parse_rates(rates_file), batch_size=options["batch_size"])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"Loaded {written} rates (quoted in {settings.FX_BASE_CURRENCY})."))
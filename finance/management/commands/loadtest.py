@@ -0,0 +1,84 @@
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from finance.benchmarks import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a running server with concurrent GET requests and report latency percentiles. "
+        "Run it once against the WSGI server and once against the ASGI server to compare them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Server to load.")
+        parser.add_argument("--path", action="append", dest="paths", help="Path to request (repeatable). Defaults to /api/summary/.")
+        parser.add_argument("--user", required=True, help="Username to mint an access token for.")
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=2000, help="Total requests per path.")
+        parser.add_argument("--json", dest="json_path", help="Also write the results to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}.")
+        cookie = f"access_token={AccessToken.for_user(user)}"
+        target = urlsplit(options["base_url"])
+        paths = options["paths"] or ["/api/summary/"]
+
+        results = {}
+        for path in paths:
+            results[path] = self.run_path(target, path, cookie, options["concurrency"], options["requests"])
+            stats = results[path]
+            self.stdout.write(
+                f"{path}: {stats['requests']} requests, {stats['errors']} errors, {stats['rps']} req/s, "
+                f"p50 {stats['p50_ms']}ms p95 {stats['p95_ms']}ms p99 {stats['p99_ms']}ms max {stats['max_ms']}ms"
+            )
+
+        if options["json_path"]:
+            with open(options["json_path"], "w") as output:
+                json.dump({"base_url": options["base_url"], "concurrency": options["concurrency"], "results": results}, output, indent=2)
+
+    def run_path(self, target, path, cookie, concurrency, total):
+        local = threading.local()  # One keep-alive connection per worker thread
+
+        def request(_):
+            if getattr(local, "connection", None) is None:
+                connection_class = http.client.HTTPSConnection if target.scheme == "https" else http.client.HTTPConnection
+                local.connection = connection_class(target.hostname, target.port, timeout=30)
+            started = time.perf_counter()
+            try:
+                local.connection.request("GET", path, headers={"Cookie": cookie})
+                response = local.connection.getresponse()
+                response.read()
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                local.connection.close()
+                local.connection = None
+                ok = False
+            return time.perf_counter() - started, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(request, range(total)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(seconds * 1000 for seconds, ok in outcomes if ok)
+        return {
+            "requests": total,
+            "errors": sum(1 for _, ok in outcomes if not ok),
+            "rps": round(total / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        }
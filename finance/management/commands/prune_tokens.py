@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding and blacklisted JWTs in small batches. Schedule it (e.g. daily cron); "
+        "unlike flushexpiredtokens it never holds one long transaction over the whole table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Primary-key range handled per transaction.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be deleted.")
+
+    def handle(self, *args, **options):
+        now = aware_utcnow()
+        batch_size = options["batch_size"]
+        bounds = OutstandingToken.objects.aggregate(low=Min("id"), high=Max("id"))
+        outstanding = blacklisted = 0
+
+        # Walk the table by primary-key range: each batch is a bounded index range scan, and
+        # expires_at (which has no index) is only checked within it.
+        low = bounds["low"]
+        while low is not None and low <= bounds["high"]:
+            ids = list(
+                OutstandingToken.objects.filter(id__gte=low, id__lt=low + batch_size, expires_at__lte=now)
+                .values_list("id", flat=True)
+            )
+            low += batch_size
+            if not ids:
+                continue
+            if options["dry_run"]:
+                outstanding += len(ids)
+                blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).count()
+                continue
+            with transaction.atomic():
+                blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+                outstanding += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {outstanding} expired outstanding tokens and {blacklisted} blacklist entries."
+        ))
@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from finance import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly transaction rollups from scratch and check them against the raw transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", dest="users", help="Username to rebuild (repeatable). Defaults to everyone.")
+        parser.add_argument("--check-only", action="store_true", help="Only compare rollups with transactions, don't rebuild.")
+
+    def handle(self, *args, **options):
+        users = None
+        if options["users"]:
+            users = list(User.objects.filter(username__in=options["users"]))
+            if len(users) != len(set(options["users"])):
+                raise CommandError("Unknown username in --user.")
+
+        if not options["check_only"]:
+            written = rollups.rebuild(users)
+            self.stdout.write(f"Rebuilt {written} rollup rows.")
+
+        mismatches = rollups.verify(users)
+        for user_id, transaction_type, expected, actual in mismatches:
+            self.stderr.write(
+                f"user={user_id} type={transaction_type}: transactions total/count {expected}, rollups {actual}"
+            )
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} rollup totals do not match the transactions.")
+        self.stdout.write(self.style.SUCCESS("Rollups match the transaction totals."))
@@ -0,0 +1,110 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from finance import rollups
+from finance.analytics import add_months
+from finance.models import Budget, Category, Transaction
+
+# name, type, (min, max) amount, relative frequency, merchants used as descriptions
+CATEGORIES = [
+    ("Salary", "income", (2000, 8000), 2, ["Payroll", "ACME Corp salary"]),
+    ("Freelance", "income", (100, 2000), 2, ["Invoice payment", "Upwork", "Client transfer"]),
+    ("Interest", "income", (1, 50), 1, ["Savings interest"]),
+    ("Groceries", "expense", (15, 150), 20, ["Whole Foods", "Trader Joe's", "Costco", "Local market"]),
+    ("Rent", "expense", (800, 2500), 2, ["Monthly rent"]),
+    ("Dining", "expense", (8, 80), 18, ["Starbucks", "Chipotle", "Uber Eats", "DoorDash", "Pizza place"]),
+    ("Transport", "expense", (2, 60), 15, ["Uber", "Lyft", "Metro card", "Shell gas"]),
+    ("Utilities", "expense", (30, 250), 3, ["Electricity bill", "Water bill", "Internet", "Phone plan"]),
+    ("Entertainment", "expense", (5, 120), 8, ["Netflix", "Spotify", "Cinema", "Steam"]),
+    ("Health", "expense", (10, 400), 4, ["Pharmacy", "Gym membership", "Dentist"]),
+    ("Shopping", "expense", (10, 500), 10, ["Amazon", "Target", "IKEA", "Best Buy"]),
+]
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = "Generate realistic users, categories, transactions and budgets for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--tx-per-user", type=int, default=1000)
+        parser.add_argument("--months", type=int, default=36, help="History length; transactions are spread over it.")
+        parser.add_argument("--prefix", default="seed", help="Username prefix; seeded users are <prefix>_<n>.")
+        parser.add_argument("--password", default="spendwise-bench", help="Password for every seeded user.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42, help="Random seed, for repeatable data sets.")
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(f"Users named {options['prefix']}_* already exist; pick another --prefix.")
+
+        rng = random.Random(options["seed"])
+        started = time.monotonic()
+        today = date.today()
+        first_day = add_months(today.replace(day=1), -(options["months"] - 1))
+        span_days = (today - first_day).days + 1
+        password = make_password(options["password"])  # Hash once; every seeded user shares it
+        weights = [category[3] for category in CATEGORIES]
+
+        total_transactions = 0
+        user_numbers = range(options["users"])
+        for user_chunk in chunked(user_numbers, max(1, options["batch_size"] // 10)):
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(username=f"{options['prefix']}_{n}", email=f"{options['prefix']}_{n}@example.com", password=password)
+                    for n in user_chunk
+                ])
+                categories = Category.objects.bulk_create([
+                    Category(user=user, name=name, category_type=category_type)
+                    for user in users
+                    for name, category_type, *_ in CATEGORIES
+                ])
+                per_user = len(CATEGORIES)
+                Budget.objects.bulk_create([
+                    Budget(user=user, month=add_months(first_day, offset), amount=rng.randrange(1500, 6000, 100))
+                    for user in users
+                    for offset in range(options["months"])
+                ])
+
+            def transactions():
+                for index, user in enumerate(users):
+                    own = categories[index * per_user:(index + 1) * per_user]
+                    for spec_index in rng.choices(range(per_user), weights=weights, k=options["tx_per_user"]):
+                        name, category_type, (low, high), _, merchants = CATEGORIES[spec_index]
+                        yield Transaction(
+                            user=user,
+                            category=own[spec_index],
+                            amount=round(rng.uniform(low, high), 2),
+                            transaction_type=category_type,
+                            description=rng.choice(merchants),
+                            date=first_day + timedelta(days=rng.randrange(span_days)),
+                        )
+
+            for batch in chunked(transactions(), options["batch_size"]):
+                with transaction.atomic():
+                    Transaction.objects.bulk_create(batch)
+                total_transactions += len(batch)
+            rollups.rebuild(users)
+            self.stdout.write(f"{user_chunk[-1] + 1} users, {total_transactions} transactions...")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['users']} users and {total_transactions} transactions in {elapsed:.1f}s "
+            f"({total_transactions / elapsed if elapsed else 0:.0f} rows/s)."
+        ))
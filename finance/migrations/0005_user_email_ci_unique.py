@@ -0,0 +1,42 @@
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+# auth_user.email has neither an index nor a uniqueness guarantee, so the login and sign-up
+# lookups were table scans. This adds a unique index on LOWER(email) (blank emails excepted),
+# which finance.serializers.users_with_email() is written to use.
+EMAIL_CONSTRAINT = models.UniqueConstraint(
+    Lower("email"),
+    name="auth_user_email_lower_uniq",
+    condition=~models.Q(email=""),
+)
+
+
+def add_email_index(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    duplicates = list(
+        User.objects.exclude(email="").annotate(email_lower=Lower("email"))
+        .values("email_lower").annotate(users=models.Count("id")).filter(users__gt=1)
+        .values_list("email_lower", flat=True)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Cannot add the case-insensitive unique email index; these emails belong to several users: "
+            + ", ".join(duplicates)
+        )
+    schema_editor.add_constraint(User, EMAIL_CONSTRAINT)
+
+
+def remove_email_index(apps, schema_editor):
+    schema_editor.remove_constraint(apps.get_model("auth", "User"), EMAIL_CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('finance', '0004_statement_imports'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_email_index, remove_email_index),
+    ]
@@ -0,0 +1,96 @@
+from datetime import date
+
+from django.db import migrations, models
+
+
+def parse_month(value):
+    try:
+        year, month = map(int, value.strip().split("-"))
+        return date(year, month, 1)
+    except (ValueError, AttributeError):
+        return None
+
+
+def months_to_dates(apps, schema_editor):
+    """Budget.month was free text. YYYY-MM (or YYYY-M) becomes the first of that month.
+
+    Rows that don't parse, or that would duplicate another row of the same user and month,
+    stop the migration (like 0005 does for duplicate emails) so they can be fixed by hand
+    instead of being dropped.
+    """
+    Budget = apps.get_model("finance", "Budget")
+    seen, unparsable, duplicates, updated = {}, [], [], []
+    for budget in Budget.objects.order_by("id").only("id", "user_id", "month").iterator(chunk_size=2000):
+        month = parse_month(budget.month)
+        if month is None:
+            unparsable.append(f"{budget.id} ({budget.month!r})")
+            continue
+        if (budget.user_id, month) in seen:
+            duplicates.append(f"{budget.id} (same month as {seen[(budget.user_id, month)]})")
+            continue
+        seen[(budget.user_id, month)] = budget.id
+        budget.month_date = month
+        updated.append(budget)
+        if len(updated) >= 2000:
+            Budget.objects.bulk_update(updated, ["month_date"])  # Rolled back with the migration if it fails below
+            updated = []
+    if unparsable or duplicates:
+        problems = []
+        if unparsable:
+            problems.append("months that are not YYYY-MM: " + ", ".join(unparsable[:20]))
+        if duplicates:
+            problems.append("duplicate months: " + ", ".join(duplicates[:20]))
+        raise RuntimeError("Cannot convert Budget.month to dates; fix or delete these budgets first. " + "; ".join(problems))
+    Budget.objects.bulk_update(updated, ["month_date"])
+
+
+def dates_to_months(apps, schema_editor):
+    Budget = apps.get_model("finance", "Budget")
+    updated = []
+    for budget in Budget.objects.only("id", "month_date").iterator(chunk_size=2000):
+        budget.month = f"{budget.month_date:%Y-%m}"
+        updated.append(budget)
+    Budget.objects.bulk_update(updated, ["month"], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_budgetalert'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='budget',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='budget',
+            name='month_date',
+            field=models.DateField(null=True),
+        ),
+        migrations.AlterField(  # Lets the reverse migration re-add the column before filling it
+            model_name='budget',
+            name='month',
+            field=models.CharField(max_length=7, null=True),
+        ),
+        migrations.RunPython(months_to_dates, dates_to_months),
+        migrations.RemoveField(
+            model_name='budget',
+            name='month',
+        ),
+        migrations.RenameField(
+            model_name='budget',
+            old_name='month_date',
+            new_name='month',
+        ),
+        migrations.AlterField(
+            model_name='budget',
+            name='month',
+            field=models.DateField(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='budget',
+            unique_together={('user', 'month')},
+        ),
+    ]
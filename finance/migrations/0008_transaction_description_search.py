@@ -0,0 +1,37 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.db import migrations
+
+from finance import search
+
+
+def search_index():
+    return GinIndex(search.search_vector(), name=search.INDEX_NAME)
+
+
+def add_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        # Concurrently, so building it on a large table doesn't block writes (hence atomic = False)
+        schema_editor.add_index(apps.get_model("finance", "Transaction"), search_index(), concurrently=True)
+    elif vendor == "sqlite":
+        search.ensure_sqlite_index(schema_editor.connection.alias)
+
+
+def remove_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.remove_index(apps.get_model("finance", "Transaction"), search_index(), concurrently=True)
+    elif vendor == "sqlite":
+        search.drop_sqlite_index(schema_editor, "finance_transaction")
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('finance', '0007_budget_month_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_index, remove_search_index),
+    ]
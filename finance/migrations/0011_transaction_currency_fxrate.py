@@ -0,0 +1,59 @@
+# Generated by Django 5.2 on 2026-10-18 07:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def home_currencies(apps, schema_editor):
+    """Existing amounts were entered in the user's home currency; record it where it isn't USD."""
+    UserProfile = apps.get_model("finance", "UserProfile")
+    for user_id, currency in UserProfile.objects.exclude(currency="USD").values_list("user_id", "currency"):
+        for model_name in ("Transaction", "ArchivedTransaction", "MonthlyRollup"):
+            apps.get_model("finance", model_name).objects.filter(user_id=user_id).update(currency=currency[:3].upper())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0010_archivedtransaction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='monthlyrollup',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='archivedtransaction',
+            name='currency',
+            field=models.CharField(default='USD', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='monthlyrollup',
+            name='currency',
+            field=models.CharField(default='USD', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='currency',
+            field=models.CharField(default='USD', max_length=3),
+        ),
+        migrations.RunPython(home_currencies, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='monthlyrollup',
+            unique_together={('user', 'month', 'transaction_type', 'category', 'currency')},
+        ),
+        migrations.CreateModel(
+            name='FxRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3)),
+                ('date', models.DateField()),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18)),
+            ],
+            options={
+                'unique_together': {('currency', 'date')},
+            },
+        ),
+    ]
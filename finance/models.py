@@ -36,21 +36,124 @@ class Transaction(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)  # Each transaction belongs to a user
     category = models.ForeignKey("finance.Category", on_delete=models.CASCADE)  # Category for the transaction
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, default="USD")  # ISO 4217 code of `amount`; the API defaults it to the user's currency
     transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)  # "income" or "expense"
     description = models.TextField(blank=True, null=True)  # Optional description
     date = models.DateField()
+    import_key = models.CharField(max_length=64, null=True, blank=True, editable=False)  # Set by statement imports to skip rows already imported
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "date", "id"], name="transaction_user_date_id"),  # Keyset pagination
+            # One per supported list filter (see finance/filters.py), each still ordered for the cursor
+            models.Index(fields=["user", "transaction_type", "date", "id"], name="transaction_user_type_date"),
+            models.Index(fields=["user", "category", "date", "id"], name="transaction_user_cat_date"),
+            models.Index(fields=["user", "amount", "id"], name="transaction_user_amount_id"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "import_key"], name="transaction_user_import_key"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.transaction_type} - {self.amount}"
     
 
+class ArchivedTransaction(models.Model):
+    """Cold tier for old transactions, moved here by `archive_transactions` (see finance/archive.py).
+
+    Keeps the Transaction's id and columns, so reads can merge both tiers; rows are read-only.
+    """
+    id = models.BigIntegerField(primary_key=True)  # The id the row had in Transaction
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    category = models.ForeignKey("finance.Category", on_delete=models.CASCADE)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, default="USD")
+    transaction_type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    description = models.TextField(blank=True, null=True)
+    date = models.DateField()
+    import_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "date", "id"], name="archived_tx_user_date_id"),  # Archived rows are only read per user, by date or id
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "import_key"], name="archived_tx_user_import_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.transaction_type} - {self.amount} (archived)"
+
+
+class CategoryRule(models.Model):
+    """Maps statement descriptions to a category during imports (case-insensitive substring match)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    pattern = models.CharField(max_length=100)
+    category = models.ForeignKey("finance.Category", on_delete=models.CASCADE)
+    priority = models.IntegerField(default=0)  # Higher priority rules are tried first
+
+    def __str__(self):
+        return f"{self.pattern} -> {self.category.name}"
+
+
 class Budget(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
-    month = models.CharField(max_length=7)  # Format: YYYY-MM (e.g., 2025-04)
+    month = models.DateField()  # First day of the month; the API reads and writes it as YYYY-MM
+
+    class Meta:
+        unique_together = ('user', 'month')  # One budget per month per user; its index also serves (user, month range) lookups
+
+    def __str__(self):
+        return f"{self.user.username} - {self.month:%Y-%m}: {self.amount}"
+
+class MonthlyRollup(models.Model):
+    """Running totals per user, month, type, category and currency, maintained on every transaction write.
+
+    Totals are in the transactions' own currency; readers convert them with finance.fx.converted().
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.DateField()  # First day of the month
+    transaction_type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    category = models.ForeignKey("finance.Category", on_delete=models.CASCADE)  # Rows go away with the category's transactions
+    currency = models.CharField(max_length=3, default="USD")
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'month', 'transaction_type', 'category', 'currency')
+
+    def __str__(self):
+        return f"{self.user.username} - {self.month:%Y-%m} - {self.transaction_type}: {self.total}"
+
+
+class FxRate(models.Model):
+    """Daily exchange rates, loaded from a file by `load_fx_rates`: one unit of `currency` is worth
+    `rate` units of settings.FX_BASE_CURRENCY on `date`."""
+    currency = models.CharField(max_length=3)
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+
+    class Meta:
+        unique_together = ('currency', 'date')  # Its index serves the "latest rate on or before" lookups
+
+    def __str__(self):
+        return f"{self.currency} {self.date}: {self.rate}"
+
+
+class BudgetAlert(models.Model):
+    """Outbox of over-budget notifications written by `evaluate_budgets`; a sender marks them delivered."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    month = models.DateField()  # First day of the month
+    budget = models.DecimalField(max_digits=10, decimal_places=2)
+    spent = models.DecimalField(max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        unique_together = ('user', 'month')  # Ensures one budget per month per user
+        unique_together = ('user', 'month')  # Re-running the evaluation never queues a second alert
+        indexes = [models.Index(fields=["delivered_at", "id"], name="budgetalert_pending")]
 
     def __str__(self):
-        return f"{self.user.username} - {self.month}: {self.amount}"
\ No newline at end of file
+        return f"{self.user.username} - {self.month:%Y-%m}: spent {self.spent} of {self.budget}"
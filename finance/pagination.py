@@ -0,0 +1,164 @@
+import base64
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TransactionCursorPagination(BasePagination):
+    """Keyset pagination over (key, id), newest first unless ?ordering= says otherwise.
+
+    The cursor holds the (key, id) of the last row on the page, so every page is a bounded
+    range scan on the (user, key, id) index no matter how deep it is. The key is date, or
+    amount with ?ordering=amount / -amount. Pages may hold model instances or values_list
+    tuples ending in (key, id).
+    """
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    # ?ordering= value -> (key column, descending); each key has a (user, key, id) index
+    orderings = {
+        "-date": ("date", True),
+        "date": ("date", False),
+        "-amount": ("amount", True),
+        "amount": ("amount", False),
+    }
+    default_ordering = "-date"
+    key_parsers = {"date": date.fromisoformat, "amount": Decimal}
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_ordering(self, request):
+        """The (key, descending) pair picked by ?ordering=."""
+        requested = request.query_params.get(self.ordering_query_param) or self.default_ordering
+        if requested not in self.orderings:
+            raise ValidationError({self.ordering_query_param: f"Use one of: {', '.join(self.orderings)}."})
+        return self.orderings[requested]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """`queryset` may also be a list of querysets over the same columns (hot and archived
+        transactions): each is range-scanned for one page and the pages are merged."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.key, descending = self.get_ordering(request)
+        position = self.decode_cursor(request)
+        querysets = queryset if isinstance(queryset, (list, tuple)) else [queryset]
+
+        page = []
+        for queryset in querysets:
+            page.extend(self.page_slice(queryset, descending, position))
+        if len(querysets) > 1:
+            page.sort(key=self.get_position, reverse=descending)
+
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.next_position = self.get_position(page[-1]) if self.has_next else None
+        return page
+
+    def page_slice(self, queryset, descending, position):
+        """Up to page_size + 1 rows after `position`, in cursor order."""
+        prefix = "-" if descending else ""
+        queryset = queryset.order_by(f"{prefix}{self.key}", f"{prefix}id")
+        if position is not None:
+            last_key, last_id = position
+            before, bound = ("lt", "lte") if descending else ("gt", "gte")
+            # The inclusive bound keeps the OR inside a single index range
+            queryset = queryset.filter(**{f"{self.key}__{bound}": last_key}).filter(
+                Q(**{f"{self.key}__{before}": last_key}) | Q(**{self.key: last_key, f"id__{before}": last_id})
+            )
+        return list(queryset[:self.page_size + 1])
+
+    def get_position(self, row):
+        if isinstance(row, tuple):
+            return row[-2], row[-1]
+        return getattr(row, self.key), row.id
+
+    def get_page_size(self, request):
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            raw_key, raw_id = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii").split("|")
+            key = self.key_parsers[self.key](raw_key)
+            if isinstance(key, Decimal) and not key.is_finite():
+                raise ValueError(raw_key)
+            return key, int(raw_id)
+        except (TypeError, ValueError, UnicodeError, InvalidOperation):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        key = position[0].isoformat() if isinstance(position[0], date) else position[0]
+        raw = f"{key}|{position[1]}"
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii"))
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class SearchResultsPagination(TransactionCursorPagination):
+    """Pages of ranked search results: ?page=N with the same {"next", "results"} shape as the list.
+
+    Results are ordered by rank, which has no usable keyset, so this pages by offset and fetches
+    one extra row to know whether there is a next page instead of counting the matches. Pages
+    may also be merged from a list of querysets (hot and archived transactions) whose
+    values_list rows end in (rank, key, id).
+    """
+    page_size = 50
+    max_page_size = 200
+    page_query_param = "page"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        try:
+            self.page_number = max(1, int(request.query_params.get(self.page_query_param, 1)))
+        except ValueError:
+            raise NotFound("Invalid page")
+        offset = (self.page_number - 1) * self.page_size
+        if isinstance(queryset, (list, tuple)):
+            # The page can come from either tier: take everything up to its end from each, merged by rank
+            page = []
+            for tier in queryset:
+                page.extend(tier[:offset + self.page_size + 1])
+            page.sort(key=lambda row: row[-3:], reverse=True)
+            page = page[offset:offset + self.page_size + 1]
+        else:
+            page = list(queryset[offset:offset + self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        return page[:self.page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.page_number + 1)
@@ -0,0 +1,179 @@
+import hashlib
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .fx import RATES_VERSION_KEY
+
+VERSION_KEY = "finance:version:{user_id}"
+RESPONSE_KEY = "finance:response:{user_id}:{version}:{digest}"
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def stats():
+    """Hit/miss counters for this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _seed():
+    # Versions start from the clock, so one re-created after an eviction never repeats an
+    # earlier version; clients may still hold ETags built from those
+    return time.time_ns()
+
+
+def get_version(user_id):
+    """The user's data version joined with the FX rates version (one cache round trip).
+
+    Every converted total depends on both, so reloading rates moves every user to a new version.
+    """
+    key = VERSION_KEY.format(user_id=user_id)
+    found = cache.get_many([key, RATES_VERSION_KEY])
+    version = found.get(key)
+    if version is None:
+        version = _seed()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)  # Another request seeded it first
+    return f"{version}.{found.get(RATES_VERSION_KEY, 0)}"
+
+
+def _bump(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:  # Key missing or evicted
+        cache.set(key, _seed(), timeout=None)
+
+
+def bump_version(user_id):
+    """Invalidate every cached response for a user by moving them to a new data version.
+
+    Bumped immediately and again on commit, so a read that raced the write can't
+    leave pre-commit data cached under the new version.
+    """
+    _bump(user_id)
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def current_month_key(request):
+    return datetime.now().strftime("%Y-%m")
+
+
+def _digest(request, vary_on):
+    parts = [request.get_full_path()]
+    if vary_on is not None:
+        parts.append(vary_on(request))
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def _timeout():
+    return getattr(settings, "RESPONSE_CACHE_TIMEOUT", 3600)
+
+
+def cached_per_user(vary_on=None):
+    """Cache a view method's response data per user, path and data version.
+
+    `vary_on` optionally adds a per-request value (like the current month) to the key.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            user_id = request.user.pk
+            key = RESPONSE_KEY.format(user_id=user_id, version=get_version(user_id), digest=_digest(request, vary_on))
+
+            cached = cache.get(key)
+            if cached is not None:
+                _count("hits")
+                status_code, data = cached
+                response = Response(data, status=status_code)
+                response["X-Cache"] = "HIT"
+                return response
+
+            _count("misses")
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code < 500:
+                cache.set(key, (response.status_code, response.data), timeout=_timeout())
+            response["X-Cache"] = "MISS"
+            return response
+        return wrapper
+    return decorator
+
+
+def etag(request, vary_on=None):
+    """Strong ETag for a user's response: changes with the data version, path, vary_on and Accept."""
+    user_id = request.user.pk
+    parts = f"{user_id}|{get_version(user_id)}|{_digest(request, vary_on)}|{request.META.get('HTTP_ACCEPT', '')}"
+    return f'"{hashlib.sha1(parts.encode()).hexdigest()}"'
+
+
+def conditional_per_user(vary_on=None):
+    """Answer GETs whose If-None-Match holds the current ETag with 304, before the view runs.
+
+    The ETag costs one cache read (the user's data version) and no queries, so a client
+    polling unchanged data gets an empty 304 instead of a re-queried, re-serialized body.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            current = etag(request, vary_on)
+            if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+            if current in if_none_match or "*" in if_none_match:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+            response["ETag"] = current
+            response["Cache-Control"] = "private, no-cache"  # Browsers keep it but revalidate every time
+            return response
+        return wrapper
+    return decorator
+
+
+async def aget_version(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    found = await cache.aget_many([key, RATES_VERSION_KEY])
+    version = found.get(key)
+    if version is None:
+        version = _seed()
+        if not await cache.aadd(key, version, timeout=None):
+            version = await cache.aget(key, version)
+    return f"{version}.{found.get(RATES_VERSION_KEY, 0)}"
+
+
+def acached_per_user(vary_on=None):
+    """cached_per_user for async function views that return (data, status) tuples."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            user_id = request.user.pk
+            key = RESPONSE_KEY.format(user_id=user_id, version=await aget_version(user_id), digest=_digest(request, vary_on))
+
+            cached = await cache.aget(key)
+            if cached is not None:
+                _count("hits")
+                status_code, data = cached
+                return data, status_code, "HIT"
+
+            _count("misses")
+            data, status_code = await view(request, *args, **kwargs)
+            if status_code < 500:
+                await cache.aset(key, (status_code, data), timeout=_timeout())
+            return data, status_code, "MISS"
+        return wrapper
+    return decorator
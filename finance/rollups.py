@@ -0,0 +1,181 @@
+import heapq
+from collections import defaultdict
+from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncMonth
+
+from . import fx
+from .models import ArchivedTransaction, Budget, MonthlyRollup, Transaction
+
+
+CENT = Decimal("0.01")
+
+
+def month_start(day):
+    """Return the first day of the month a date falls in."""
+    return day.replace(day=1)
+
+
+def _key(tx):
+    return (tx.user_id, month_start(tx.date), tx.transaction_type, tx.category_id, tx.currency)
+
+
+def apply_deltas(deltas):
+    """Apply {(user_id, month, type, category_id, currency): (amount, count)} to the rollup table.
+
+    Must be called inside the same atomic block as the transaction write it mirrors.
+    """
+    for (user_id, month, transaction_type, category_id, currency), (amount, count) in deltas.items():
+        if not amount and not count:
+            continue
+        lookup = dict(user_id=user_id, month=month, transaction_type=transaction_type, category_id=category_id, currency=currency)
+        updated = MonthlyRollup.objects.filter(**lookup).update(total=F("total") + amount, count=F("count") + count)
+        if updated:
+            continue
+        try:
+            with transaction.atomic():  # Savepoint so a concurrent insert doesn't break the outer transaction
+                MonthlyRollup.objects.create(total=amount, count=count, **lookup)
+        except IntegrityError:
+            MonthlyRollup.objects.filter(**lookup).update(total=F("total") + amount, count=F("count") + count)
+
+
+def record(added=(), removed=()):
+    """Fold added/removed transactions into one delta per rollup row and apply them."""
+    deltas = defaultdict(lambda: [Decimal("0"), 0])
+    for tx in added:
+        delta = deltas[_key(tx)]
+        delta[0] += Decimal(tx.amount)
+        delta[1] += 1
+    for tx in removed:
+        delta = deltas[_key(tx)]
+        delta[0] -= Decimal(tx.amount)
+        delta[1] -= 1
+    apply_deltas({key: tuple(value) for key, value in deltas.items()})
+
+
+def type_sums(prefix="", **extra):
+    """Sum() per transaction type over rollup rows (under `prefix`), converted to the user's currency.
+
+    Conditional aggregation: every type comes out of one pass, as columns of one row.
+    """
+    return {
+        transaction_type: Sum(
+            fx.converted(f"{prefix}total", currency=f"{prefix}currency", month=f"{prefix}month",
+                         profile="profile" if prefix else "user__profile"),
+            filter=Q(**{f"{prefix}transaction_type": transaction_type}, **extra),
+        )
+        for transaction_type in ("income", "expense")
+    }
+
+
+def _totals(row):
+    return {key: (row[key] or Decimal("0")).quantize(CENT) for key in ("income", "expense")}
+
+
+def totals_by_type(user, **filters):
+    """Sum the rollups for a user into {"income": Decimal, "expense": Decimal}, in their home currency."""
+    return _totals(MonthlyRollup.objects.filter(user=user, **filters).aggregate(**type_sums()))
+
+
+async def atotals_by_type(user, **filters):
+    """Async version of totals_by_type."""
+    return _totals(await MonthlyRollup.objects.filter(user=user, **filters).aaggregate(**type_sums()))
+
+
+def overview(user, month):
+    """All-time totals plus `month`'s expenses and budget for one user, in a single query.
+
+    Returns {"income", "expense", "month_expense": Decimal, "budget": Decimal or None}, in the
+    user's currency. The query starts from the user row, so a user without rollups still gets zeros.
+    """
+    rollup = "monthlyrollup__"
+    row = (
+        User.objects.filter(pk=user.pk)
+        .annotate(
+            **type_sums(rollup),
+            month_expense=type_sums(rollup, **{f"{rollup}month": month})["expense"],
+            budget_amount=Subquery(Budget.objects.filter(user=OuterRef("pk"), month=month).values("amount")[:1]),
+        )
+        .values("income", "expense", "month_expense", "budget_amount")
+        .get()
+    )
+    return {**_totals(row), "month_expense": (row["month_expense"] or Decimal("0")).quantize(CENT), "budget": row["budget_amount"]}
+
+
+ROLLUP_KEY = ("user_id", "month", "transaction_type", "category_id", "currency")
+
+
+def grouped_by_month(transactions):
+    """Totals and counts of a transaction queryset per rollup key, sorted by it, as dicts."""
+    return (
+        transactions.annotate(month=TruncMonth("date"))
+        .values(*ROLLUP_KEY)
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by(*ROLLUP_KEY)
+        .iterator(chunk_size=2000)
+    )
+
+
+def rebuild(users=None):
+    """Recompute the rollup table from the raw transactions, hot and archived. Returns the number of rows written."""
+    tiers = [Transaction.objects.all(), ArchivedTransaction.objects.all()]
+    rollups = MonthlyRollup.objects.all()
+    if users is not None:
+        tiers = [tier.filter(user__in=users) for tier in tiers]
+        rollups = rollups.filter(user__in=users)
+
+    # Both tiers come back sorted by the rollup key, so equal keys are adjacent after the merge
+    key = itemgetter(*ROLLUP_KEY)
+    merged = heapq.merge(*(grouped_by_month(tier) for tier in tiers), key=key)
+
+    def combined():
+        for _, rows in groupby(merged, key=key):
+            rows = list(rows)
+            row = rows[0]
+            for other in rows[1:]:
+                row = {**row, "total": row["total"] + other["total"], "count": row["count"] + other["count"]}
+            yield MonthlyRollup(**row)
+
+    with transaction.atomic():
+        rollups.delete()
+        created = MonthlyRollup.objects.bulk_create(combined(), batch_size=1000)
+    return len(created)
+
+
+def verify(users=None):
+    """Compare rollup totals with the raw transaction totals (hot and archived) per user and type.
+
+    Returns a list of (user_id, transaction_type, expected, actual) mismatches.
+    """
+    tiers = [Transaction.objects.all(), ArchivedTransaction.objects.all()]
+    rollups = MonthlyRollup.objects.all()
+    if users is not None:
+        tiers = [tier.filter(user__in=users) for tier in tiers]
+        rollups = rollups.filter(user__in=users)
+
+    def grouped(queryset, field):
+        return {
+            # Quantized: SQLite sums decimals as floats, which shows once two tiers are added up
+            (row["user_id"], row["transaction_type"]): ((row["total"] or Decimal("0")).quantize(CENT), row["count"])
+            for row in queryset.values("user_id", "transaction_type")
+            .annotate(total=Sum(field), count=Sum("count") if field == "total" else Count("id"))
+            .order_by()
+        }
+
+    expected = grouped(tiers[0], "amount")
+    for key, (total, count) in grouped(tiers[1], "amount").items():
+        hot_total, hot_count = expected.get(key, (Decimal("0"), 0))
+        expected[key] = (hot_total + total, hot_count + count)
+    actual = grouped(rollups, "total")
+    mismatches = []
+    for key in sorted(set(expected) | set(actual)):
+        want = expected.get(key, (Decimal("0"), 0))
+        got = actual.get(key, (Decimal("0"), 0))
+        if want != got:
+            mismatches.append((key[0], key[1], want, got))
+    return mismatches
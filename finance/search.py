@@ -0,0 +1,134 @@
+"""Full-text search over transaction descriptions, in both tiers (hot and archived).
+
+PostgreSQL: a GIN index on to_tsvector('simple', description) per tier (migrations 0008 and
+0012). The query below uses exactly that expression, so it is matched by the index and never
+needs a stored column.
+
+SQLite: an FTS5 external-content table per tier (finance_transaction_fts and
+finance_archivedtransaction_fts), kept in step with its table by triggers, so bulk_create,
+queryset updates, cascading deletes and archive moves are indexed too. SQLite rebuilds a table
+(dropping its triggers) on some schema changes; ensure_sqlite_index() runs after every migrate
+and puts them back.
+
+Every search term matches as a word prefix ("ube" finds "Uber Eats"); all terms must match.
+Other databases fall back to one icontains per term, newest first. Each tier is searched and
+ranked on its own; SearchResultsPagination merges the two by rank. (SQLite's bm25() weighs
+terms by their frequency in each tier's own index, so ranks across tiers are close, not exact.)
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import Q
+
+SEARCH_CONFIG = "simple"  # No stemming or stop words: merchant names aren't English prose
+INDEX_NAME = "transaction_description_search"
+ARCHIVED_INDEX_NAME = "archived_tx_description_search"
+# Table -> its SQLite FTS5 index
+FTS_TABLES = {
+    "finance_transaction": "finance_transaction_fts",
+    "finance_archivedtransaction": "finance_archivedtransaction_fts",
+}
+MAX_TERMS = 8
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def sqlite_triggers(table):
+    """Trigger name -> CREATE TRIGGER statement keeping `table`'s FTS index in step with it."""
+    fts = FTS_TABLES[table]
+    return {
+        f"{fts}_ai": f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, description) VALUES (new.id, new.description);
+            END""",
+        f"{fts}_ad": f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, description) VALUES ('delete', old.id, old.description);
+            END""",
+        f"{fts}_au": f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF description ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, description) VALUES ('delete', old.id, old.description);
+                INSERT INTO {fts}(rowid, description) VALUES (new.id, new.description);
+            END""",
+    }
+
+
+def search_vector():
+    return SearchVector("description", config=SEARCH_CONFIG)
+
+
+def terms(query):
+    """The words of a search string, lower-cased; at most MAX_TERMS."""
+    return [term.lower() for term in _TERM.findall(query or "")][:MAX_TERMS]
+
+
+def search(queryset, query):
+    """Filter a Transaction or ArchivedTransaction queryset to rows matching `query`, best match
+    first (ties newest first). Ranked rows carry a `rank` column; higher is better."""
+    words = terms(query)
+    if not words:
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+
+    if vendor == "postgresql":
+        tsquery = SearchQuery(" & ".join(f"{word}:*" for word in words), config=SEARCH_CONFIG, search_type="raw")
+        queryset = queryset.alias(search=search_vector()).filter(search=tsquery).annotate(
+            rank=SearchRank(search_vector(), tsquery)
+        )
+    elif sqlite_index_exists(queryset.db, queryset.model._meta.db_table):
+        table = queryset.model._meta.db_table
+        fts = FTS_TABLES[table]
+        match = " ".join(f'"{word}"*' for word in words)
+        # A join rather than a correlated subquery, so MATCH and bm25() are evaluated once per match
+        queryset = queryset.extra(
+            tables=[fts],
+            where=[f"{fts}.rowid = {table}.id", f"{fts} MATCH %s"],
+            params=[match],
+            select={"rank": f"-bm25({fts})"},  # bm25() is lower-is-better
+        )
+    else:
+        condition = Q()
+        for word in words:
+            condition &= Q(description__icontains=word)
+        return queryset.filter(condition).extra(select={"rank": "0"}).order_by("-date", "-id")  # Unranked: newest first
+    return queryset.order_by("-rank", "-date", "-id")
+
+
+def sqlite_index_exists(using="default", table="finance_transaction"):
+    """Whether `table`'s FTS5 index exists (SQLite only)."""
+    if connections[using].vendor != "sqlite":
+        return False
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLES[table]])
+        return cursor.fetchone() is not None
+
+
+def ensure_sqlite_index(using="default"):
+    """Create each existing table's FTS5 index and triggers if missing; rebuild an index if any of its triggers was gone."""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    tables = set(connection.introspection.table_names())
+    with connection.cursor() as cursor:
+        for table, fts in FTS_TABLES.items():
+            if table not in tables:  # Migrations before the archive (0010) only index the hot tier
+                continue
+            triggers = sqlite_triggers(table)
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", [f"{fts}_%"])
+            existing = {name for (name,) in cursor.fetchall()}
+            if existing == set(triggers) and fts in tables:
+                continue
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"description, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+            )
+            for sql in triggers.values():
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")  # Writes made without triggers
+
+
+def drop_sqlite_index(schema_editor, table):
+    """Drop `table`'s FTS5 index and its triggers."""
+    for trigger in sqlite_triggers(table):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLES[table]}")
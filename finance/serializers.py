@@ -1,10 +1,31 @@
+from datetime import date
+
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
 from rest_framework import serializers
-from .models import Category, Transaction, Budget
+from . import fx
+from .models import Category, CategoryRule, Transaction, Budget
 
 
 User = get_user_model()  # Ensures we use the correct User model
 
+
+def users_with_email(email):
+    """Case-insensitive email match written to hit the unique LOWER(email) index (see migration 0005)."""
+    # The index is partial (blank emails excluded), so the query repeats that condition for the planner
+    return User.objects.exclude(email="").alias(email_lower=Lower("email")).filter(email_lower=Lower(Value(email)))
+
+
+def authenticate_by_email(email, password):
+    """The user with this email and password, or None. Upgrades the stored hash if its cost is outdated."""
+    user = users_with_email(email).first()
+    if user is None:
+        User().set_password(password)  # Hash anyway so unknown emails take as long as wrong passwords
+        return None
+    return user if user.check_password(password) else None
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(required=True, allow_blank=False, max_length=255)
 
@@ -13,8 +34,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'password']
 
     def validate_email(self, value):
-        """Ensure email is unique"""
-        if User.objects.filter(email=value).exists():
+        """Ensure email is unique, ignoring case"""
+        if users_with_email(value).exists():
             raise serializers.ValidationError("A user with this email already exists.")
         return value
 
@@ -25,23 +46,26 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             email=validated_data['email']
         )
         user.set_password(validated_data['password'])  # Hash the password
-        user.save()
+        try:
+            with transaction.atomic():
+                user.save()
+        except IntegrityError:  # Lost a race with a concurrent sign-up for the same username or email
+            raise serializers.ValidationError("A user with this username or email already exists.")
         return user
     
-class UserLoginSerializer(serializers.Serializer):
+class LoginCredentialsSerializer(serializers.Serializer):
+    """Shape of a login request, without checking the password (the async login does that itself)."""
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True, min_length=6)
 
+
+class UserLoginSerializer(LoginCredentialsSerializer):
     def validate(self, data):
         email = data.get("email")
         password = data.get("password")
 
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            raise serializers.ValidationError("Invalid credentials")
-
-        if not user.check_password(password):
+        user = authenticate_by_email(email, password)
+        if user is None:
             raise serializers.ValidationError("Invalid credentials")
 
         data["user"] = user  # Store user object for later use
@@ -53,19 +77,99 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ["id", "name", "category_type"]
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class CategoryRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CategoryRule
+        fields = ["id", "pattern", "category", "priority"]
+
+    def validate_category(self, value):
+        """Rules can only point at the user's own categories."""
+        if value.user_id != self.context["request"].user.id:
+            raise serializers.ValidationError("Invalid category.")
+        return value
+
+
+class DynamicFieldsMixin:
+    """Accepts a `fields` kwarg and drops every declared field not listed in it."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class CurrencyField(serializers.CharField):
+    """A three-letter ISO 4217 code, stored upper-case."""
+    default_error_messages = {"invalid": "Use a three-letter ISO 4217 currency code."}
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data).upper()
+        if len(value) != 3 or not value.isalpha():
+            self.fail("invalid")
+        return value
+
+
+def check_convertible(currency, home, day):
+    """Foreign amounts need rates for both currencies, or the converted totals would skip them."""
+    if currency == home:
+        return
+    for code in (currency, home):
+        if fx.rates.rate(code, day) is None:
+            raise serializers.ValidationError({"currency": f"No exchange rates are loaded for {code}."})
+
+
+class TransactionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    currency = CurrencyField(required=False)  # Defaults to the user's currency
+
     class Meta:
         model = Transaction
-        fields = ["id", "user", "category", "amount", "transaction_type", "description", "date"]
+        fields = ["id", "user", "category", "amount", "currency", "transaction_type", "description", "date"]
         read_only_fields = ["user"]  # User should be automatically assigned
 
     def validate(self, data):
-        """Ensure category type matches transaction type."""
-        if data["category"].category_type != data["transaction_type"]:
+        """Ensure category type matches transaction type, and foreign amounts can be converted."""
+        def value(name, default=None):
+            return data[name] if name in data else getattr(self.instance, name, default)  # PATCH keeps stored values
+
+        if value("category").category_type != value("transaction_type"):
             raise serializers.ValidationError("Category type must match transaction type.")
+        home = fx.home_currency(self.context["request"].user)
+        if "currency" not in data and self.instance is None:
+            data["currency"] = home  # New transactions default to the user's currency
+        fx.rates.sync()  # Once per write; check_convertible's lookups don't touch the shared cache
+        check_convertible(value("currency", home), home, value("date"))
         return data
     
+class BulkTransactionItemSerializer(serializers.Serializer):
+    """One item of a bulk create. Category is a plain id here; ownership and type are checked in one batch by the view."""
+    category = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    currency = CurrencyField(required=False)  # Defaults to the user's currency
+    transaction_type = serializers.ChoiceField(choices=Transaction.TRANSACTION_TYPES)
+    description = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    date = serializers.DateField()
+
+
+class MonthField(serializers.Field):
+    """A first-of-month date on the model, "YYYY-MM" in the API."""
+    default_error_messages = {"invalid": "Use the YYYY-MM format."}
+
+    def to_representation(self, value):
+        return f"{value:%Y-%m}"
+
+    def to_internal_value(self, data):
+        try:
+            year, month = map(int, str(data).split("-"))
+            return date(year, month, 1)
+        except ValueError:
+            self.fail("invalid")
+
+
 class BudgetSerializer(serializers.ModelSerializer):
+    month = MonthField()
+
     class Meta:
         model = Budget
         fields = ['id', 'amount', 'month']
\ No newline at end of file
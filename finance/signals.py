@@ -0,0 +1,44 @@
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from spend_wise.utils import db_router
+
+from . import fx, response_cache
+from .models import Budget, Category, Transaction, UserProfile
+
+
+def user_data_changed(user_id):
+    """Call after any write to a user's finance data; bulk writes must call it themselves."""
+    response_cache.bump_version(user_id)
+    db_router.mark_written(user_id)
+
+
+def delete_quietly(queryset):
+    """Delete the rows in one DELETE, without loading them or sending per-row signals; returns the count.
+
+    QuerySet.delete() reads back every row of a model with delete receivers (Transaction has
+    them) to send post_delete once per row. Only for rows nothing cascades to; the caller keeps
+    the rollups right and calls user_data_changed() once per affected user.
+    """
+    return queryset._raw_delete(queryset.db)  # Django's fast-delete path without the collector (private API)
+
+
+@receiver(pre_save, sender=UserProfile)
+def require_home_currency_rates(sender, instance, **kwargs):
+    """Totals are converted to the home currency, so it can't be one without exchange rates."""
+    currency = instance.currency[:3].upper()  # As fx.home_currency reads it
+    if not fx.has_rates(currency):
+        raise ValidationError({"currency": f"No exchange rates are loaded for {currency}."})
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+@receiver(post_save, sender=UserProfile)  # The home currency every total is converted to
+@receiver(post_delete, sender=UserProfile)
+def bump_user_data_version(sender, instance, **kwargs):
+    user_data_changed(instance.user_id)
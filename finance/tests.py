@@ -1,3 +1,934 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from spend_wise.utils import instrumentation
+from spend_wise.utils.authentication import USER_VERSION_KEY, user_cache
+from spend_wise.utils.db_router import LAST_WRITE_KEY, ReplicaRouter, ause_replica, mark_written, use_replica
+from spend_wise.utils.revocation import revocation_index
+
+from . import archive, budgets, fx, importers, response_cache, rollups
+from .models import ArchivedTransaction, Budget, BudgetAlert, Category, CategoryRule, MonthlyRollup, Transaction, UserProfile
+from .serializers import CategorySerializer, TransactionSerializer, users_with_email
+
+
+class FinanceAPITestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="alice", email="alice@example.com", password="secret123")
+        self.client.force_authenticate(self.user)
+        self.salary = Category.objects.create(user=self.user, name="Salary", category_type="income")
+        self.food = Category.objects.create(user=self.user, name="Food", category_type="expense")
+
+    def create_transaction(self, category, amount, day, **extra):
+        payload = {
+            "category": category.id,
+            "amount": str(amount),
+            "transaction_type": category.category_type,
+            "date": day.isoformat(),
+            **extra,
+        }
+        response = self.client.post("/api/transactions/", payload, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
+
+
+class MonthlyRollupTests(FinanceAPITestCase):
+    def test_writes_keep_rollups_in_step(self):
+        self.create_transaction(self.salary, "1000.00", date(2025, 4, 1))
+        expense = self.create_transaction(self.food, "40.00", date(2025, 4, 10))
+        self.create_transaction(self.food, "10.00", date(2025, 5, 2))
+
+        self.client.put(
+            f"/api/transactions/{expense['id']}/",
+            {**expense, "amount": "25.00", "date": "2025-05-03"},
+            format="json",
+        )
+        april = MonthlyRollup.objects.get(user=self.user, month=date(2025, 4, 1), category=self.food)
+        may = MonthlyRollup.objects.get(user=self.user, month=date(2025, 5, 1), category=self.food)
+        self.assertEqual((april.total, april.count), (Decimal("0"), 0))
+        self.assertEqual((may.total, may.count), (Decimal("35.00"), 2))
+
+        self.client.delete(f"/api/transactions/{expense['id']}/")
+        may.refresh_from_db()
+        self.assertEqual((may.total, may.count), (Decimal("10.00"), 1))
+        self.assertEqual(rollups.verify(), [])
+
+    def test_partial_updates_validate_against_stored_values(self):
+        expense = self.create_transaction(self.food, "40.00", date(2025, 4, 10))
+        url = f"/api/transactions/{expense['id']}/"
+        self.assertEqual(self.client.patch(url, {"amount": "30.00"}, format="json").status_code, 200)
+        self.assertEqual(self.client.patch(url, {"category": self.salary.id}, format="json").status_code, 400)
+        self.assertEqual(rollups.verify(), [])
+
+    def test_summaries_read_rollups(self):
+        self.create_transaction(self.salary, "1000.00", date(2025, 4, 1))
+        self.create_transaction(self.food, "40.00", date(2025, 4, 10))
+        self.create_transaction(self.food, "5.00", date(2025, 3, 31))
+
+        summary = self.client.get("/api/summary/").data
+        self.assertEqual(summary["total_income"], Decimal("1000.00"))
+        self.assertEqual(summary["total_expense"], Decimal("45.00"))
+        self.assertEqual(summary["balance"], Decimal("955.00"))
+
+        budget_summary = self.client.get("/api/budget-summary/2025-04/").data
+        self.assertEqual(budget_summary["total_expenses"], 40.0)
+
+    def test_rebuild_command_repairs_drift(self):
+        Transaction.objects.create(user=self.user, category=self.food, amount="12.50", transaction_type="expense", date=date(2025, 1, 5))
+        self.assertEqual(len(rollups.verify()), 1)
+
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(rollups.totals_by_type(self.user)["expense"], Decimal("12.50"))
+
+
+class TransactionPaginationTests(FinanceAPITestCase):
+    def test_cursor_walks_every_row_once_newest_first(self):
+        for day in (1, 2, 2, 2, 3):
+            self.create_transaction(self.food, "1.00", date(2025, 4, day))
+
+        seen, url = [], "/api/transactions/?page_size=2"
+        while url:
+            page = self.client.get(url).data
+            self.assertLessEqual(len(page["results"]), 2)
+            seen.extend((row["date"], row["id"]) for row in page["results"])
+            url = page["next"]
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_fields_parameter_limits_columns(self):
+        self.create_transaction(self.food, "3.00", date(2025, 4, 1), description="Lunch")
+
+        row = self.client.get("/api/transactions/?fields=id,amount").data["results"][0]
+        self.assertEqual(set(row), {"id", "amount"})
+        self.assertEqual(self.client.get("/api/transactions/?fields=nope").status_code, 400)
+        self.assertEqual(self.client.get("/api/transactions/?cursor=garbage").status_code, 404)
+
+    def test_fast_list_matches_model_serializers_byte_for_byte(self):
+        self.create_transaction(self.food, "3.5", date(2025, 4, 1), description="Lunch")
+        self.create_transaction(self.salary, "1200.00", date(2025, 4, 2))
+
+        response = self.client.get("/api/transactions/")
+        expected = TransactionSerializer(Transaction.objects.order_by("-date", "-id"), many=True).data
+        self.assertEqual(response.content, JSONRenderer().render({"next": None, "results": expected}))
+        categories = self.client.get("/api/categories/")
+        self.assertEqual(categories.content, JSONRenderer().render(CategorySerializer(Category.objects.all(), many=True).data))
+
+
+class TransactionFilterTests(FinanceAPITestCase):
+    # query string -> the composite indexes allowed to serve it
+    INDEXED_FILTERS = {
+        "date_from=2025-04-01&date_to=2025-04-30": ("transaction_user_date_id",),
+        "type=expense": ("transaction_user_type_date",),
+        "type=expense&date_from=2025-04-01": ("transaction_user_type_date",),
+        "category={food}&date_to=2025-04-30": ("transaction_user_cat_date",),
+        # Several categories: probe each (user, category) range and sort, or walk the user's dates
+        "category={food},{salary}": ("transaction_user_cat_date", "transaction_user_date_id"),
+        "amount_min=5&amount_max=50": ("transaction_user_amount_id",),
+        "ordering=amount": ("transaction_user_amount_id",),
+        "ordering=-amount&amount_max=50": ("transaction_user_amount_id",),
+    }
+
+    def list_plan(self, query):
+        """EXPLAIN output of the SELECT the list endpoint runs for `query`."""
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(f"/api/transactions/?{query}").status_code, 200)
+        sql = next(q["sql"] for q in queries.captured_queries if 'FROM "finance_transaction"' in q["sql"])
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SET LOCAL enable_seqscan = off")  # Tiny test tables would always be seq scanned
+                cursor.execute(f"EXPLAIN {sql}")
+            else:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+    def test_supported_filters_use_their_composite_index(self):
+        for query, indexes in self.INDEXED_FILTERS.items():
+            query = query.format(food=self.food.id, salary=self.salary.id)
+            with self.subTest(query=query):
+                plan = self.list_plan(query)
+                self.assertTrue(any(index in plan for index in indexes), plan)
+                self.assertNotRegex(plan, r"\bSCAN finance_transaction\b|Seq Scan on finance_transaction")
+
+    def test_filters_and_amount_ordering(self):
+        self.create_transaction(self.salary, "1000.00", date(2025, 4, 1))
+        for amount, day in (("12.00", 2), ("3.50", 3), ("12.00", 4), ("40.00", 5)):
+            self.create_transaction(self.food, amount, date(2025, 4, day))
+
+        def amounts(url):
+            seen = []
+            while url:
+                page = self.client.get(url).data
+                seen.extend(row["amount"] for row in page["results"])
+                url = page["next"]
+            return seen
+
+        self.assertEqual(amounts(f"/api/transactions/?category={self.food.id}&amount_min=12&ordering=amount"), ["12.00", "12.00", "40.00"])
+        self.assertEqual(amounts("/api/transactions/?ordering=-amount&page_size=2"), ["1000.00", "40.00", "12.00", "12.00", "3.50"])
+        self.assertEqual(amounts("/api/transactions/?type=expense&date_to=2025-04-03"), ["3.50", "12.00"])
+        for query in ("amount_min=lots", "amount_max=NaN", "category=food", "ordering=description", "type=gift"):
+            self.assertEqual(self.client.get(f"/api/transactions/?{query}").status_code, 400, query)
+
+
+class TransactionArchiveTests(FinanceAPITestCase):
+    def test_archived_rows_keep_reading_the_same(self):
+        old = self.create_transaction(self.food, "40.00", date(2020, 3, 1), description="Old lunch")
+        self.create_transaction(self.salary, "900.00", date(2020, 3, 2))
+        recent = date.today().replace(day=1)
+        self.create_transaction(self.food, "10.00", recent)
+        paths = ("/api/transactions/?page_size=1", "/api/summary/", "/api/analytics/categories/", "/api/transactions/export/?file_type=ndjson")
+
+        def snapshot():
+            cache.clear()
+            page, rows = self.client.get(paths[0]).data, []
+            while True:
+                rows.extend(page["results"])
+                if not page["next"]:
+                    break
+                page = self.client.get(page["next"]).data
+            export = b"".join(self.client.get(paths[3]).streaming_content)
+            return rows, self.client.get(paths[1]).data, self.client.get(paths[2]).data, export
+
+        before = snapshot()
+        out = StringIO()
+        call_command("archive_transactions", "--older-than", "1", "--batch-size", "1", stdout=out)
+        self.assertIn("Moved 2 transactions", out.getvalue())
+
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(ArchivedTransaction.objects.count(), 2)
+        self.assertEqual(snapshot(), before)
+        self.assertEqual(self.client.get(f"/api/transactions/{old['id']}/").data, old)
+        self.assertEqual(self.client.put(f"/api/transactions/{old['id']}/", old, format="json").status_code, 404)
+        self.assertEqual(rollups.verify(), [])
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(rollups.totals_by_type(self.user), {"income": Decimal("900.00"), "expense": Decimal("50.00")})
+
+
+class TransactionSearchTests(FinanceAPITestCase):
+    def search(self, query, **params):
+        return self.client.get("/api/transactions/search/", {"q": query, **params})
+
+    def test_search_is_ranked_paginated_and_follows_writes(self):
+        ride = self.create_transaction(self.food, "12.00", date(2025, 4, 1), description="Uber trip")
+        self.create_transaction(self.food, "30.00", date(2025, 4, 2), description="Uber Eats, uber one")
+        self.create_transaction(self.food, "9.00", date(2025, 4, 3), description="Lyft")
+        items = [{"category": self.food.id, "amount": "5.00", "transaction_type": "expense", "date": "2025-04-04", "description": "UBER bulk"}]
+        self.client.post("/api/transactions/bulk/", items, format="json")
+        other = User.objects.create_user(username="gina", password="secret123")
+        Transaction.objects.create(user=other, category=self.food, amount="1.00", transaction_type="expense", date=date(2025, 4, 5), description="Uber")
+
+        results = self.search("ube").data["results"]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["description"], "Uber Eats, uber one")  # Two hits rank first
+        self.assertEqual([row["description"] for row in self.search("uber eats").data["results"]], ["Uber Eats, uber one"])
+
+        page = self.search("uber", page_size=2, fields="id").data
+        self.assertEqual(len(page["results"]), 2)
+        self.assertEqual(set(page["results"][0]), {"id"})
+        self.assertEqual(len(self.client.get(page["next"]).data["results"]), 1)
+
+        payload = {"category": self.food.id, "amount": "12.00", "transaction_type": "expense", "date": "2025-04-01", "description": "Taxi"}
+        self.client.put(f"/api/transactions/{ride['id']}/", payload, format="json")
+        self.assertEqual(len(self.search("uber").data["results"]), 2)
+        self.assertEqual(len(self.search("taxi").data["results"]), 1)
+        self.food.delete()  # Cascades to every transaction in the category
+        self.assertEqual(self.search("taxi").data["results"], [])
+        self.assertEqual(self.search(" ,. ").status_code, 400)
+
+    def test_archived_transactions_are_searched_and_merged_by_rank(self):
+        self.create_transaction(self.food, "12.00", date(2020, 3, 1), description="Uber Eats, uber one")
+        self.create_transaction(self.food, "8.00", date(2020, 3, 2), description="Uber trip")
+        recent = self.create_transaction(self.food, "5.00", date.today().replace(day=1), description="Uber")
+        before = self.search("uber").data["results"]
+        call_command("archive_transactions", "--older-than", "1", stdout=StringIO())
+
+        self.assertEqual(ArchivedTransaction.objects.count(), 2)
+        after = self.search("uber").data["results"]
+        self.assertCountEqual(after, before)  # bm25 ranks each tier on its own index, so only the order may move
+        self.assertIn(recent, after)
+        pages = [self.search("uber", page_size=1, page=number).data for number in (1, 2, 3)]
+        self.assertEqual([row for page in pages for row in page["results"]], after)
+        self.assertEqual([bool(page["next"]) for page in pages], [True, True, False])
+        self.assertEqual([row["description"] for row in self.search("trip").data["results"]], ["Uber trip"])
+
+
+class BulkTransactionTests(FinanceAPITestCase):
+    def test_bulk_create_uses_constant_queries(self):
+        items = [
+            {"category": self.food.id, "amount": "2.50", "transaction_type": "expense", "date": f"2025-04-{day:02d}"}
+            for day in range(1, 29)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/transactions/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        statements = [query["sql"] for query in queries.captured_queries]
+        self.assertEqual(sum('FROM "finance_category"' in sql for sql in statements), 1)
+        self.assertEqual(sum(sql.startswith('INSERT INTO "finance_transaction"') for sql in statements), 1)
+        self.assertEqual(response.data["created"], 28)
+        self.assertEqual(rollups.totals_by_type(self.user)["expense"], Decimal("70.00"))
+
+    def test_bulk_create_reports_errors_per_item_and_writes_nothing(self):
+        other = User.objects.create_user(username="bob", password="secret123")
+        foreign = Category.objects.create(user=other, name="Bob's", category_type="expense")
+        items = [
+            {"category": self.food.id, "amount": "1.00", "transaction_type": "expense", "date": "2025-04-01"},
+            {"category": self.salary.id, "amount": "1.00", "transaction_type": "expense", "date": "2025-04-01"},
+            {"category": foreign.id, "amount": "1.00", "transaction_type": "expense", "date": "2025-04-01"},
+            {"category": self.food.id, "amount": "abc", "transaction_type": "expense", "date": "2025-04-01"},
+        ]
+        response = self.client.post("/api/transactions/bulk/", items, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.data["errors"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("non_field_errors", errors[1])
+        self.assertIn("category", errors[2])
+        self.assertIn("amount", errors[3])
+        self.assertFalse(Transaction.objects.exists())
+
+
+class StatementImportTests(FinanceAPITestCase):
+    CSV = (
+        "Date,Description,Amount\n"
+        "2025-04-01,ACME PAYROLL,2500.00\n"
+        "2025-04-02,Uber Eats,-18.40\n"
+        "2025-04-02,Uber Eats,-18.40\n"
+        "2025-04-03,Mystery,-1.00\n"
+        "not a date,Uber Eats,-5.00\n"
+    )
+
+    def setUp(self):
+        super().setUp()
+        CategoryRule.objects.create(user=self.user, pattern="payroll", category=self.salary)
+        CategoryRule.objects.create(user=self.user, pattern="uber", category=self.food)
+
+    def upload(self, content, name="statement.csv"):
+        upload = SimpleUploadedFile(name, content.encode())
+        return self.client.post("/api/transactions/import/", {"file": upload}, format="multipart")
+
+    def test_csv_import_maps_rules_and_skips_reimports(self):
+        response = self.upload(self.CSV)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            (response.data["imported"], response.data["duplicates"], response.data["rejected"]), (3, 0, 2)
+        )
+        self.assertEqual(Transaction.objects.filter(category=self.food).count(), 2)
+        self.assertEqual(rollups.totals_by_type(self.user)["expense"], Decimal("36.80"))
+
+        again = self.upload(self.CSV).data
+        self.assertEqual((again["imported"], again["duplicates"]), (0, 3))
+        self.assertEqual(Transaction.objects.count(), 3)
+
+    def test_ofx_parser_streams_single_line_files(self):
+        ofx = (
+            "<OFX><BANKTRANLIST>"
+            "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250405120000<TRNAMT>-9.99<FITID>A1<NAME>Uber trip</STMTTRN>"
+            "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250406<TRNAMT>100.00<FITID>A2<NAME>Payroll</STMTTRN>"
+            "</BANKTRANLIST></OFX>"
+        )
+        rows = list(importers.iter_ofx(StringIO(ofx), chunk_size=16))
+        self.assertEqual([row["reference"] for _, row in rows], ["A1", "A2"])
+        self.assertEqual(rows[0][1]["date"], "20250405")
+
+        result = importers.StatementImporter(self.user).run(iter(rows))
+        self.assertEqual((result.imported, result.rejected), (2, 0))
+
+    def test_date_order_is_chosen_per_statement_and_bad_csv_is_a_400(self):
+        statement = "Date,Description,Amount\n04/05/2025,Uber,-1.00\n25/04/2025,Uber,-2.00\n"
+        self.assertEqual(self.upload(statement).data["rejected"], 0)
+        self.assertEqual(Transaction.objects.get(amount="1.00").date, date(2025, 5, 4))
+
+        upload = SimpleUploadedFile("us.csv", statement.replace("Uber", "Uber US").encode())
+        response = self.client.post("/api/transactions/import/", {"file": upload, "date_order": "mdy"}, format="multipart")
+        self.assertEqual((response.data["imported"], response.data["rejected"]), (1, 1))  # 25/04 is no month-first date
+        self.assertEqual(Transaction.objects.get(description="Uber US").date, date(2025, 4, 5))
+
+        response = self.upload("Date,Description,Amount\n2025-04-01,Uber," + "9" * 200000 + "\n")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Malformed CSV", response.data["error"])
+
+
+class TransactionExportTests(FinanceAPITestCase):
+    def test_export_streams_filtered_rows(self):
+        self.create_transaction(self.salary, "1000.00", date(2025, 3, 1))
+        self.create_transaction(self.food, "12.00", date(2025, 4, 1), description="Tacos, extra salsa")
+        self.create_transaction(self.food, "8.00", date(2025, 5, 1))
+
+        response = self.client.get("/api/transactions/export/?type=expense&date_to=2025-04-30")
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,date,type,category_id,category,amount,description,currency")
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"Tacos, extra salsa"', lines[1])
+
+        response = self.client.get("/api/transactions/export/?file_type=ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["amount"] for row in rows], ["1000.00", "12.00", "8.00"])
+        self.assertEqual(self.client.get("/api/transactions/export/?date_from=April").status_code, 400)
+
+
+class CookieAuthenticationCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(username="carol", email="carol@example.com", password="secret123")
+        self.client.cookies["access_token"] = str(AccessToken.for_user(self.user))
+
+    def auth_user_queries(self, path, method="get"):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(path)
+        return response, sum('FROM "auth_user"' in query["sql"] for query in queries.captured_queries)
+
+    def test_repeat_requests_skip_user_lookup(self):
+        response, lookups = self.auth_user_queries("/api/categories/")
+        self.assertEqual((response.status_code, lookups), (200, 1))
+        response, lookups = self.auth_user_queries("/api/categories/")
+        self.assertEqual((response.status_code, lookups), (200, 0))
+
+    def test_deactivation_and_logout_invalidate(self):
+        self.client.get("/api/categories/")
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/categories/").status_code, 401)
+
+        self.user.is_active = True
+        self.user.save()
+        self.client.get("/api/categories/")
+        self.assertEqual(len(user_cache), 1)
+        self.client.post("/api/logout/")
+        self.assertEqual(len(user_cache), 0)
+
+    def test_invalidations_from_other_workers_are_seen(self):
+        self.client.get("/api/categories/")
+        User.objects.filter(pk=self.user.pk).update(is_active=False)  # No signal reaches this process's cache
+        self.assertEqual(self.client.get("/api/categories/").status_code, 200)
+        cache.set(USER_VERSION_KEY.format(user_id=self.user.pk), "bumped")  # What invalidate_user publishes elsewhere
+        self.assertEqual(self.client.get("/api/categories/").status_code, 401)
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class EmailLoginTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="dave", email="Dave@Example.com", password="secret123")
+
+    def test_email_is_unique_ignoring_case_and_uses_the_index(self):
+        response = self.client.post(
+            "/api/register/", {"username": "dave2", "email": "dave@example.COM", "password": "secret123"}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.data)
+        self.assertIn("auth_user_email_lower_uniq", users_with_email("dave@example.com").explain())
+
+    def test_login_ignores_case_and_rehashes_outdated_passwords(self):
+        self.assertIn("$1000$", self.user.password)
+        for path in ("/api/login/", "/api/async/login/"):
+            with override_settings(PASSWORD_HASH_ITERATIONS=2000 if path == "/api/login/" else 3000):
+                response = self.client.post(path, {"email": "DAVE@example.com", "password": "secret123"}, format="json")
+            self.assertEqual(response.status_code, 200, path)
+            self.assertIn("access_token", response.cookies)
+        self.user.refresh_from_db()
+        self.assertIn("$3000$", self.user.password)
+
+        for path in ("/api/login/", "/api/async/login/"):
+            response = self.client.post(path, {"email": "nobody@example.com", "password": "secret123"}, format="json")
+            self.assertEqual(response.status_code, 400)
+
+
+# A cache every worker process can read, as the in-process indexes require (spend_wise/utils/shared_cache.py)
+SHARED_CACHES = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": tempfile.mkdtemp()}}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class TokenRevocationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        revocation_index.clear()
+        self.user = User.objects.create_user(username="erin", email="erin@example.com", password="secret123")
+
+    def refresh(self, token):
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/refresh/", {"refresh": str(token)}, format="json")
+        checks = sum('FROM "token_blacklist_blacklistedtoken" INNER JOIN' in query["sql"] for query in queries.captured_queries)
+        return response, checks
+
+    def test_rotated_tokens_are_rejected_from_the_in_process_index(self):
+        token = RefreshToken.for_user(self.user)
+        response, _ = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.refresh(token)[0].status_code, 401)  # Loads the new blacklist row once
+        response, checks = self.refresh(response.data["refresh"])
+        self.assertEqual((response.status_code, checks), (200, 0))
+
+    def test_per_process_caches_check_the_database(self):
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}):
+            token = RefreshToken.for_user(self.user)
+            response, _ = self.refresh(token)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.refresh(token)[0].status_code, 401)
+            response, checks = self.refresh(response.data["refresh"])
+        self.assertEqual((response.status_code, checks), (200, 1))
+        self.assertEqual(len(revocation_index), 0)  # Never loaded
+
+    def test_prune_deletes_only_expired_tokens(self):
+        expired, fresh = RefreshToken.for_user(self.user), RefreshToken.for_user(self.user)
+        expired.blacklist()
+        fresh.blacklist()
+        RefreshToken.for_user(self.user)
+        OutstandingToken.objects.filter(jti=expired["jti"]).update(expires_at=timezone.now() - timedelta(days=1))
+        OutstandingToken.objects.exclude(jti=fresh["jti"]).exclude(jti=expired["jti"]).update(
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+
+        call_command("prune_tokens", "--batch-size", "1", stdout=StringIO())
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), [fresh["jti"]])
+        self.assertEqual(BlacklistedToken.objects.get().token.jti, fresh["jti"])
+
+
+class ResponseCacheTests(FinanceAPITestCase):
+    def test_summary_is_served_from_cache_until_data_changes(self):
+        self.create_transaction(self.food, "10.00", date(2025, 4, 1))
+        first = self.client.get("/api/summary/")
+        self.assertEqual(first["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            second = self.client.get("/api/summary/")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.data, first.data)
+
+        self.client.post(
+            "/api/transactions/bulk/",
+            [{"category": self.food.id, "amount": "5.00", "transaction_type": "expense", "date": "2025-04-02"}],
+            format="json",
+        )
+        third = self.client.get("/api/summary/")
+        self.assertEqual(third["X-Cache"], "MISS")
+        self.assertEqual(third.data["total_expense"], Decimal("15.00"))
+
+    def test_versions_are_per_user(self):
+        other = User.objects.create_user(username="dave", password="secret123")
+        self.client.get("/api/budget-summary/2025-04/")
+        before = response_cache.get_version(self.user.pk)
+        Category.objects.create(user=other, name="Misc", category_type="expense")
+        self.assertEqual(response_cache.get_version(self.user.pk), before)
+        self.assertEqual(self.client.get("/api/budget-summary/2025-04/")["X-Cache"], "HIT")
+
+
+class ConditionalGetTests(FinanceAPITestCase):
+    def test_matching_etag_is_answered_without_queries(self):
+        self.create_transaction(self.food, "10.00", date(2025, 4, 1))
+        for path in ("/api/transactions/", "/api/categories/", "/api/summary/"):
+            with self.subTest(path=path):
+                first = self.client.get(path)
+                self.assertEqual(first["Cache-Control"], "private, no-cache")
+
+                with self.assertNumQueries(0):
+                    unchanged = self.client.get(path, HTTP_IF_NONE_MATCH=first["ETag"])
+                self.assertEqual(unchanged.status_code, 304)
+                self.assertEqual(unchanged.content, b"")
+                self.assertEqual(unchanged["ETag"], first["ETag"])
+                self.assertNotEqual(self.client.get(f"{path}?fields=id")["ETag"], first["ETag"])
+
+                Budget.objects.create(user=self.user, month=date(2025, 4, 1), amount="100.00")
+                changed = self.client.get(path, HTTP_IF_NONE_MATCH=first["ETag"])
+                self.assertEqual(changed.status_code, 200)
+                self.assertNotEqual(changed["ETag"], first["ETag"])
+                Budget.objects.filter(user=self.user).delete()
+
+    def test_etags_survive_a_version_eviction(self):
+        first = self.client.get("/api/categories/")
+        Category.objects.create(user=self.user, name="Rent", category_type="expense")
+        cache.delete(response_cache.VERSION_KEY.format(user_id=self.user.pk))  # The next read re-seeds it
+        self.assertEqual(self.client.get("/api/categories/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+
+class CurrencyTests(FinanceAPITestCase):
+    RATES = "date,currency,rate\n2025-03-31,EUR,1.10\n2025-04-15,EUR,1.20\n2025-01-01,GBP,1.25\n"
+
+    def setUp(self):
+        super().setUp()
+        fx.rates.clear()
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as rates_file:
+            rates_file.write(self.RATES)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("load_fx_rates", rates_file.name, stdout=StringIO())
+
+    def test_totals_are_converted_inside_the_aggregates(self):
+        self.create_transaction(self.food, "40.00", date(2025, 4, 2))
+        self.create_transaction(self.food, "100.00", date(2025, 4, 20), currency="eur")  # April uses the 03-31 rate
+        Budget.objects.create(user=self.user, month=date(2025, 4, 1), amount="120.00")
+
+        self.assertEqual(self.client.get("/api/summary/").data["total_expense"], Decimal("150.00"))
+        self.assertEqual(self.client.get("/api/budget-summary/2025-04/").data["total_expenses"], 150.0)
+        series = self.client.get("/api/analytics/timeseries/?from=2025-04&to=2025-04").data["series"]
+        self.assertEqual(series[0]["expense"], 150.0)
+        self.assertEqual(self.client.get("/api/analytics/categories/").data["totals"]["expense"], 150.0)
+        [status] = next(budgets.evaluate(date(2025, 4, 1)))
+        self.assertEqual((status.spent, status.over_budget), (Decimal("150.00"), True))
+        self.assertEqual(rollups.verify(), [])
+
+        UserProfile.objects.create(user=self.user, currency="EUR")  # 40 USD at 1.10 is 36.36 EUR
+        self.assertEqual(self.client.get("/api/summary/").data["total_expense"], Decimal("136.36"))
+
+    def test_reloading_rates_invalidates_cached_totals(self):
+        self.create_transaction(self.food, "100.00", date(2025, 4, 20), currency="EUR")
+        first = self.client.get("/api/summary/")
+        self.assertEqual(first.data["total_expense"], Decimal("110.00"))
+
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as rates_file:
+            rates_file.write("date,currency,rate\n2025-03-31,EUR,2.00\n")
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("load_fx_rates", rates_file.name, stdout=StringIO())
+
+        second = self.client.get("/api/summary/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual((second.status_code, second["X-Cache"]), (200, "MISS"))
+        self.assertEqual(second.data["total_expense"], Decimal("200.00"))
+
+    def test_home_currency_needs_rates(self):
+        self.create_transaction(self.food, "100.00", date(2025, 4, 20), currency="EUR")
+        with self.assertRaises(ValidationError):
+            UserProfile.objects.create(user=self.user, currency="JPY")  # The EUR expense would drop out of every total
+        profile = UserProfile.objects.create(user=self.user, currency="GBP")
+        self.assertEqual(self.client.get("/api/analytics/categories/").data["totals"]["expense"], 88.0)  # 100 EUR at 1.10 / 1.25
+        profile.currency = "jpy"
+        with self.assertRaises(ValidationError):
+            profile.save()
+
+    def test_bulk_writes_check_the_rates_version_once(self):
+        payload = {"category": self.food.id, "amount": "5.00", "transaction_type": "expense", "date": "2025-04-01", "currency": "EUR"}
+        with mock.patch.object(fx, "cache", wraps=cache) as shared:
+            response = self.client.post("/api/transactions/bulk/", [payload] * 5, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(shared.get.call_count, 1)
+
+    def test_writes_need_rates_for_foreign_currencies(self):
+        payload = {"category": self.food.id, "amount": "5.00", "transaction_type": "expense", "date": "2025-04-01"}
+        self.assertEqual(self.client.post("/api/transactions/", {**payload, "currency": "JPY"}, format="json").status_code, 400)
+        self.assertEqual(self.client.post("/api/transactions/", {**payload, "currency": "euro"}, format="json").status_code, 400)
+        response = self.client.post("/api/transactions/bulk/", [payload, {**payload, "currency": "JPY"}], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"][0], {})
+        self.assertEqual(self.client.post("/api/transactions/bulk/", [{**payload, "currency": "GBP"}], format="json").status_code, 201)
+        self.assertEqual(Transaction.objects.get().currency, "GBP")
+        self.assertEqual(fx.rates.rate("EUR", date(2025, 4, 14)), Decimal("1.10"))
+        self.assertEqual(fx.rates.rate("EUR", date(2025, 1, 1)), Decimal("1.10"))  # Before the first rate
+
+
+class TimeseriesTests(FinanceAPITestCase):
+    def test_series_fills_gaps_and_joins_budgets_in_two_queries(self):
+        self.create_transaction(self.salary, "1000.00", date(2025, 1, 15))
+        self.create_transaction(self.food, "40.00", date(2025, 1, 20))
+        self.create_transaction(self.food, "60.00", date(2025, 3, 2))
+        Budget.objects.create(user=self.user, month=date(2025, 3, 1), amount="500.00")
+
+        with self.assertNumQueries(2):
+            data = self.client.get("/api/analytics/timeseries/?from=2024-12&to=2025-03").data
+        self.assertEqual([point["month"] for point in data["series"]], ["2024-12", "2025-01", "2025-02", "2025-03"])
+        self.assertEqual(data["series"][1]["income"], 1000.0)
+        self.assertEqual(data["series"][2]["expense"], 0.0)
+        self.assertEqual(data["series"][3]["budget"], 500.0)
+
+        by_category = self.client.get("/api/analytics/timeseries/?from=2025-01&to=2025-03&group_by=category").data
+        self.assertEqual(by_category["series"][2]["categories"], {self.food.id: 60.0})
+        self.assertEqual([category["name"] for category in by_category["categories"]], ["Food", "Salary"])
+
+    def test_rejects_bad_ranges(self):
+        self.assertEqual(self.client.get("/api/analytics/timeseries/?from=2025-05&to=2025-01").status_code, 400)
+        self.assertEqual(self.client.get("/api/analytics/timeseries/?from=2025-13").status_code, 400)
+        self.assertEqual(self.client.get("/api/analytics/timeseries/?group_by=day").status_code, 400)
+        for edge in ("?from=9999-01&to=9999-12", "?to=0001-05", "?from=1899-12&to=1900-01"):
+            self.assertEqual(self.client.get(f"/api/analytics/timeseries/{edge}").status_code, 400, edge)
+        self.assertEqual(self.client.get("/api/budget-summary/10000-01/").status_code, 400)
+
+
+class BudgetEvaluationTests(FinanceAPITestCase):
+    def test_every_budget_in_one_query_streamed_to_sinks(self):
+        saver = User.objects.create_user(username="frank", password="secret123")
+        Budget.objects.create(user=self.user, month=date(2025, 4, 1), amount="100.00")
+        Budget.objects.create(user=saver, month=date(2025, 4, 1), amount="50.00")
+        self.create_transaction(self.food, "80.00", date(2025, 4, 2))
+        self.create_transaction(self.food, "30.00", date(2025, 4, 9))
+        self.create_transaction(self.food, "500.00", date(2025, 5, 1))  # Other months don't count
+
+        with CaptureQueriesContext(connection) as queries:
+            statuses = [status for chunk in budgets.evaluate(date(2025, 4, 1), chunk_size=1) for status in chunk]
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            [(status.user_id, status.spent, status.remaining, status.over_budget) for status in statuses],
+            [(self.user.id, Decimal("110.00"), Decimal("-10.00"), True), (saver.id, Decimal("0.00"), Decimal("50.00"), False)],
+        )
+
+        with tempfile.NamedTemporaryFile("r", suffix=".jsonl") as output:
+            call_command("evaluate_budgets", "--month", "2025-04", "--output", output.name, stderr=StringIO())
+            lines = [json.loads(line) for line in output]
+        self.assertEqual(lines[0]["spent"], "110.00")
+        self.assertEqual(len(lines), 2)
+        stdout = StringIO()
+        call_command("evaluate_budgets", "--month", "2025-04", "--over-budget-only", stdout=stdout, stderr=StringIO())
+        self.assertEqual([json.loads(line)["user_id"] for line in stdout.getvalue().splitlines()], [self.user.id])
+        with self.assertRaises(CommandError):
+            call_command("evaluate_budgets", "--sink", "outbox", "--output", "alerts.jsonl", stderr=StringIO())
+        for _ in range(2):  # Re-runs don't queue a second alert
+            call_command("evaluate_budgets", "--month", "2025-04", "--sink", "outbox", stderr=StringIO())
+        self.assertEqual(list(BudgetAlert.objects.values_list("user_id", "spent")), [(self.user.id, Decimal("110.00"))])
+
+
+class BudgetMonthTests(FinanceAPITestCase):
+    def test_months_are_dates_in_storage_and_yyyy_mm_in_the_api(self):
+        response = self.client.post("/api/budget/", {"amount": "300.00", "month": "2025-4"}, format="json")
+        self.assertEqual((response.status_code, response.data["month"]), (201, "2025-04"))
+        self.assertEqual(Budget.objects.get().month, date(2025, 4, 1))
+        self.assertEqual(self.client.post("/api/budget/", {"amount": "1", "month": "April"}, format="json").status_code, 400)
+
+        self.create_transaction(self.food, "120.00", date(2025, 4, 30))
+        self.create_transaction(self.food, "80.00", date(2025, 6, 1))
+        summary = self.client.get("/api/budget-summary/2025-04/").data
+        self.assertEqual((summary["budget"], summary["remaining_budget"]), (300.0, 180.0))
+
+    def test_for_months_takes_two_queries(self):
+        Budget.objects.create(user=self.user, month=date(2025, 6, 1), amount="50.00")
+        self.create_transaction(self.food, "80.00", date(2025, 6, 1))
+        self.create_transaction(self.food, "10.00", date(2024, 1, 5))
+        months = [date(2025, 6, 1), date(2024, 1, 1), date(2030, 1, 1)]
+
+        with CaptureQueriesContext(connection) as queries:
+            statuses = budgets.for_months(self.user, months)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(
+            [(status.month, status.budget, status.spent, status.over_budget) for status in statuses],
+            [(months[0], Decimal("50.00"), Decimal("80.00"), True), (months[1], Decimal("0.00"), Decimal("10.00"), True),
+             (months[2], Decimal("0.00"), Decimal("0.00"), False)],
+        )
+
+
+class CategoryBreakdownTests(FinanceAPITestCase):
+    def test_breakdown_is_one_grouped_query_per_tier(self):
+        rent = Category.objects.create(user=self.user, name="Rent", category_type="expense")
+        self.create_transaction(self.salary, "2000.00", date(2025, 4, 1))
+        self.create_transaction(rent, "750.00", date(2025, 4, 1))
+        self.create_transaction(self.food, "150.00", date(2025, 4, 5))
+        self.create_transaction(self.food, "100.00", date(2025, 4, 6))
+        self.create_transaction(self.food, "999.00", date(2025, 5, 1))
+
+        with self.assertNumQueries(2):  # Hot and archived transactions
+            data = self.client.get("/api/analytics/categories/?date_from=2025-04-01&date_to=2025-04-30").data
+        self.assertEqual(data["totals"], {"income": 2000.0, "expense": 1000.0})
+        expenses = [c for c in data["categories"] if c["category_type"] == "expense"]
+        self.assertEqual([(c["name"], c["total"], c["count"], c["share"]) for c in expenses], [
+            ("Rent", 750.0, 1, 0.75),
+            ("Food", 250.0, 2, 0.25),
+        ])
+
+
+class CategoryCleanupTests(FinanceAPITestCase):
+    def test_merge_moves_both_tiers_and_rules_then_deletes_the_category(self):
+        groceries = Category.objects.create(user=self.user, name="Groceries", category_type="expense")
+        old = self.create_transaction(groceries, "30.00", date(2025, 1, 12))
+        archive.move([old["id"]], date(2025, 2, 1))
+        self.create_transaction(groceries, "20.00", date(2025, 4, 1))
+        self.create_transaction(self.food, "5.00", date(2025, 4, 2))
+        rule = CategoryRule.objects.create(user=self.user, pattern="market", category=groceries)
+
+        self.assertEqual(self.client.post(f"/api/categories/{groceries.id}/merge/", {"into": self.salary.id}, format="json").status_code, 400)
+        response = self.client.post(f"/api/categories/{groceries.id}/merge/", {"into": self.food.id}, format="json")
+        self.assertEqual(response.data, {"moved": 2, "category": self.food.id})
+        self.assertFalse(Category.objects.filter(pk=groceries.pk).exists())
+        self.assertEqual(ArchivedTransaction.objects.get().category_id, self.food.id)
+        self.assertEqual(Transaction.objects.filter(category=self.food).count(), 2)
+        self.assertEqual(CategoryRule.objects.get(pk=rule.pk).category_id, self.food.id)
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(self.client.get("/api/summary/").data["total_expense"], Decimal("55.00"))
+
+    def test_recategorize_and_delete_by_filter(self):
+        rent = Category.objects.create(user=self.user, name="Rent", category_type="expense")
+        for day in (1, 2, 3):
+            self.create_transaction(self.food, "10.00", date(2025, 4, day))
+        self.create_transaction(self.salary, "100.00", date(2025, 4, 2))
+
+        url = "/api/transactions/recategorize/"
+        self.assertEqual(self.client.post(url, {"category": rent.id}, format="json").status_code, 400)  # No filter
+        self.assertEqual(self.client.post(f"{url}?date_from=2025-04-02", {"category": rent.id}, format="json").status_code, 400)  # Income row
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f"{url}?date_from=2025-04-02&type=expense", {"category": rent.id}, format="json")
+        self.assertEqual(response.data, {"updated": 2})
+        self.assertEqual(sum(query["sql"].startswith('UPDATE "finance_transaction"') for query in queries), 1)
+        self.assertEqual(Transaction.objects.filter(category=rent).count(), 2)
+
+        response = self.client.post("/api/transactions/bulk-delete/?category=%d,%d" % (rent.id, self.salary.id))
+        self.assertEqual(response.data, {"deleted": 3})
+        self.assertEqual(list(Transaction.objects.values_list("category_id", flat=True)), [self.food.id])
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(self.client.get("/api/summary/").data, {"total_income": Decimal("0.00"), "total_expense": Decimal("10.00"), "balance": Decimal("-10.00")})
+
+    def test_hot_rows_are_deleted_without_loading_them(self):
+        # cleanup.delete and archive.move bypass the delete collector; pin that each stays one
+        # DELETE and never reads the rows back (the collector would, to send per-row signals)
+        old = self.create_transaction(self.food, "5.00", date(2025, 1, 2))
+        for day in (1, 2, 3):
+            self.create_transaction(self.food, "10.00", date(2025, 4, day))
+
+        with CaptureQueriesContext(connection) as queries:
+            archive.move([old["id"]], date(2025, 2, 1))
+            self.client.post("/api/transactions/bulk-delete/?date_from=2025-04-01")
+        on_hot = [query["sql"] for query in queries if '"finance_transaction"' in query["sql"]]
+        self.assertEqual(sum(sql.startswith('DELETE FROM "finance_transaction"') for sql in on_hot), 2)
+        row_reads = [sql for sql in on_hot if sql.startswith("SELECT") and "GROUP BY" not in sql and "LIMIT 1" not in sql]
+        self.assertEqual(len(row_reads), 2)  # Only the locked reads of archive.move and cleanup.delete
+        self.assertEqual(Transaction.objects.count(), 0)
+        self.assertEqual(rollups.verify(), [])
+
+
+class DashboardTests(FinanceAPITestCase):
+    def test_dashboard_takes_three_queries(self):
+        this_month = date.today().replace(day=1)
+        self.create_transaction(self.salary, "1000.00", date(2025, 1, 10))
+        old = self.create_transaction(self.food, "30.00", date(2025, 1, 12))
+        archive.move([old["id"]], date(2025, 2, 1))
+        self.create_transaction(self.food, "40.00", this_month)
+        self.create_transaction(self.food, "25.00", this_month)
+        Budget.objects.create(user=self.user, month=this_month, amount="50.00")
+
+        with self.assertNumQueries(3):  # Totals and budget, categories, recent transactions
+            data = self.client.get("/api/dashboard/?recent=3").data
+        self.assertEqual(data["totals"], {"total_income": Decimal("1000.00"), "total_expense": Decimal("95.00"), "balance": Decimal("905.00")})
+        self.assertEqual(data["budget"], {
+            "month": f"{this_month:%Y-%m}", "budget": 50.0, "expenses": 65.0, "remaining": -15.0, "over_budget": True,
+        })
+        self.assertEqual([c["name"] for c in data["categories"]], ["Salary", "Food"])
+        self.assertEqual([t["amount"] for t in data["recent_transactions"]], ["25.00", "40.00", "30.00"])  # Archived rows included
+        self.assertEqual(data["totals"]["total_expense"], self.client.get("/api/summary/").data["total_expense"])
+
+        self.assertEqual(self.client.get("/api/dashboard/?recent=51").status_code, 400)
+        Budget.objects.all().delete()
+        self.assertEqual(self.client.get("/api/dashboard/").data["budget"]["budget"], None)
+
+
+class AsyncDashboardTests(FinanceAPITestCase):
+    def setUp(self):
+        super().setUp()
+        user_cache.clear()
+        self.client.cookies["access_token"] = str(AccessToken.for_user(self.user))
+
+    def test_async_endpoints_match_sync_ones(self):
+        self.create_transaction(self.salary, "1000.00", date(2025, 4, 1))
+        self.create_transaction(self.food, "40.00", date(2025, 4, 10))
+        Budget.objects.create(user=self.user, month=date(2025, 4, 1), amount="100.00")
+
+        summary = self.client.get("/api/async/summary/").json()
+        self.assertEqual(summary, self.client.get("/api/summary/", HTTP_ACCEPT="application/json").json())
+        self.assertEqual(summary["balance"], 960.0)
+
+        budget = self.client.get("/api/async/budget-summary/2025-04/").json()
+        self.assertEqual(budget, self.client.get("/api/budget-summary/2025-04/").data)
+        self.assertEqual(budget["total_expenses"], 40.0)
+        self.assertEqual(budget["budget"], 100.0)
+        self.assertFalse(budget["over_budget"])
+
+        series = self.client.get("/api/async/analytics/timeseries/?from=2025-03&to=2025-04").json()
+        self.assertEqual(series, self.client.get("/api/analytics/timeseries/?from=2025-03&to=2025-04").data)
+
+    def test_async_endpoints_require_authentication(self):
+        self.client.cookies.pop("access_token")
+        self.assertEqual(self.client.get("/api/async/summary/").status_code, 401)
+        self.client.cookies["access_token"] = "not-a-token"
+        self.assertEqual(self.client.get("/api/async/summary/").status_code, 401)
+        self.assertEqual(self.client.get("/api/async/budget-summary/2025-13/").status_code, 401)
+
+
+class ReplicaRouterTests(FinanceAPITestCase):
+    def test_reads_follow_replica_context_and_read_your_writes(self):
+        router = ReplicaRouter()
+        router.replica = "replica"  # Tests run without a configured replica
+        cache.delete(LAST_WRITE_KEY.format(user_id=self.user.pk))  # setUp wrote categories
+
+        self.assertEqual(router.db_for_read(Transaction), "default")
+        with use_replica(self.user.pk):
+            self.assertEqual(router.db_for_read(Transaction), "replica")
+        self.assertEqual(router.db_for_write(Transaction), "default")
+
+        self.create_transaction(self.food, "1.00", date(2025, 4, 1))
+        with use_replica(self.user.pk):
+            self.assertEqual(router.db_for_read(Transaction), "default")  # Within the write window
+
+        cache.delete(LAST_WRITE_KEY.format(user_id=self.user.pk))  # Window over
+        with use_replica(self.user.pk):
+            self.assertEqual(router.db_for_read(Transaction), "replica")
+
+        async def read_with(user_id):
+            async with ause_replica(user_id):
+                return router.db_for_read(Transaction)
+        self.assertEqual(async_to_sync(read_with)(self.user.pk), "replica")
+        mark_written(self.user.pk)
+        self.assertEqual(async_to_sync(read_with)(self.user.pk), "default")
+
+
+class SeedAndBenchCommandTests(APITestCase):
+    def test_seed_then_bench_every_route(self):
+        call_command("seed_spendwise", users=2, tx_per_user=50, months=3, stdout=StringIO())
+        self.assertEqual(Transaction.objects.count(), 100)
+        self.assertEqual(Budget.objects.filter(user__username="seed_1").count(), 3)
+        self.assertEqual(rollups.verify(), [])
+
+        with tempfile.NamedTemporaryFile("r", suffix=".json") as output:
+            call_command("bench", iterations=1, output=output.name, stdout=StringIO())
+            routes = json.load(output)["routes"]
+        self.assertEqual(routes["GET transaction-list"]["status"], 200)
+        self.assertEqual(routes["POST transaction-bulk (100)"]["status"], 201)
+        self.assertEqual(Transaction.objects.count(), 100)  # Write scenarios are rolled back
+
+
+class InstrumentationTests(FinanceAPITestCase):
+    def test_server_timing_and_metrics(self):
+        self.create_transaction(self.food, "1.00", date(2025, 4, 1))
+        response = self.client.get("/api/transactions/")
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="[1-9]\d* queries", render;dur=[\d.]+, app;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertEqual(connection.execute_wrappers, [])  # Only installed for the request
+
+        self.assertEqual(self.client.get("/api/metrics").status_code, 403)
+        with self.settings(METRICS_TOKEN="scrape-me"):
+            self.client.force_authenticate(None)
+            metrics = self.client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer scrape-me")
+        self.assertEqual(metrics.status_code, 200)
+        body = metrics.content.decode()
+        self.assertIn('spendwise_request_duration_seconds_count{view="transaction-list",method="GET"}', body)
+        self.assertIn('spendwise_requests_total{view="transaction-list",method="POST",status="201"}', body)
+
+    def test_sampled_requests_are_logged(self):
+        with override_settings(REQUEST_LOG_SAMPLE_RATE=1), self.assertLogs("spend_wise.requests") as logs:
+            self.client.get("/api/transactions/")  # The client's first request loads the middleware
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual((line["view"], line["method"], line["status"], line["slow"]), ("transaction-list", "GET", 200, False))
+
+    def test_async_requests_stay_async_and_are_timed(self):
+        async def get_response(request):
+            return HttpResponse()
+        self.assertTrue(iscoroutinefunction(instrumentation.PerformanceMiddleware(get_response)))
+
+        self.create_transaction(self.food, "1.00", date(2025, 4, 1))
+        client = AsyncClient()
+        client.cookies["access_token"] = str(AccessToken.for_user(self.user))
+        response = async_to_sync(client.get)("/api/async/summary/")
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9]\d* queries"')  # Run through sync_to_async
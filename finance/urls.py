@@ -1,13 +1,15 @@
 from django.urls import path,  include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import UserRegistrationView, UserLoginView, CategoryViewSet, TransactionViewSet, FinancialSummaryView, BudgetView, BudgetSummaryView, LogoutView
+from .views import UserRegistrationView, UserLoginView, CategoryViewSet, CategoryRuleViewSet, TransactionViewSet, FinancialSummaryView, BudgetView, BudgetSummaryView, DashboardView, LogoutView, CacheStatsView, TimeseriesView, CategoryBreakdownView, MetricsView
 from django.contrib import admin
+from . import async_views
 
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'transactions', TransactionViewSet, basename='transaction') 
+router.register(r'category-rules', CategoryRuleViewSet, basename='category-rule')
 
 
 urlpatterns = [
@@ -17,6 +19,17 @@ urlpatterns = [
     path("summary/", FinancialSummaryView.as_view(), name="financial-summary"),
     path('budget/', BudgetView.as_view(), name='budget'),
     path("budget-summary/<str:month>/", BudgetSummaryView.as_view(), name="budget_summary"),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('analytics/timeseries/', TimeseriesView.as_view(), name='analytics-timeseries'),
+    path('analytics/categories/', CategoryBreakdownView.as_view(), name='analytics-categories'),
+    path('cache-stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    # Async (ASGI) versions of the read-only dashboard endpoints
+    path('async/login/', async_views.login, name='async-login'),
+    path('async/summary/', async_views.summary, name='async-financial-summary'),
+    path('async/budget/', async_views.budget, name='async-budget'),
+    path('async/budget-summary/<str:month>/', async_views.budget_summary, name='async-budget-summary'),
+    path('async/analytics/timeseries/', async_views.timeseries, name='async-analytics-timeseries'),
     path('', include(router.urls)),
 ]
@@ -1,18 +1,29 @@
 from rest_framework.permissions import AllowAny
+from django.conf import settings
 from rest_framework import viewsets, permissions
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth.models import User
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+import io
 from rest_framework_simplejwt.tokens import RefreshToken
-from .serializers import UserRegistrationSerializer, UserLoginSerializer, CategorySerializer, TransactionSerializer, BudgetSerializer
-from .models import Category, Transaction, Budget  # Import the Category, Transaction, and Budget models
-from django.db import models  # Import models for database operations
-from django.db.models import Sum  # Import Sum for aggregation
+from .serializers import UserRegistrationSerializer, UserLoginSerializer, CategorySerializer, CategoryRuleSerializer, TransactionSerializer, BudgetSerializer, BulkTransactionItemSerializer, check_convertible
+from .models import ArchivedTransaction, Category, CategoryRule, Transaction, Budget  # Import the Category, Transaction, and Budget models
+from django.db import router, transaction
 from datetime import datetime  # Import datetime for date and time operations
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
-from spend_wise.utils.authentication import JWTAuthenticationFromCookie
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from spend_wise.utils.authentication import CookieJWTAuthentication, invalidate_user, set_auth_cookies
+from . import analytics, budgets, cleanup, exports, fast_serializers, filters, fx, importers, response_cache, rollups, search
+from .response_cache import cached_per_user, conditional_per_user, current_month_key
+from .pagination import SearchResultsPagination, TransactionCursorPagination
+from .signals import user_data_changed
+from spend_wise.utils.db_router import replica_reads
+from spend_wise.utils import instrumentation
+from spend_wise.utils.authentication import user_cache
 
 
 
@@ -51,9 +62,6 @@ class UserLoginView(generics.GenericAPIView):
         if serializer.is_valid():
             user = serializer.validated_data["user"]
 
-            refresh = RefreshToken.for_user(user)
-            access_token = str(refresh.access_token)
-
             response = Response({
                 "message": "Login successful",
                 "user": {
@@ -64,22 +72,7 @@ class UserLoginView(generics.GenericAPIView):
             }, status=status.HTTP_200_OK)
 
             # Set cookies
-            response.set_cookie(
-                key='access_token',
-                value=access_token,
-                httponly=True,
-                secure=True,  
-                samesite='None',  # IMPORTANT for cross-origin cookies
-                max_age=36000
-            )
-            response.set_cookie(
-                key='refresh_token',
-                value=str(refresh),
-                httponly=True,
-                secure=True,
-                samesite='None',  # IMPORTANT
-                max_age=7 * 24 * 3600
-            )
+            set_auth_cookies(response, RefreshToken.for_user(user))
 
             return response
 
@@ -87,10 +80,11 @@ class UserLoginView(generics.GenericAPIView):
 
 
 class LogoutView(APIView):
-    authentication_classes = [JWTAuthenticationFromCookie]
+    authentication_classes = [CookieJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        invalidate_user(request.user.pk)  # Forget the cached token so it is verified again
         response = Response({"message": "Logout successful"}, status=200)
         response.delete_cookie('access_token')
         response.delete_cookie('refresh_token')
@@ -105,41 +99,321 @@ class CategoryViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Category.objects.filter(user=self.request.user)  #Users can only see their own categories
 
+    @conditional_per_user()
+    def list(self, request, *args, **kwargs):
+        return Response(fast_serializers.encode_categories(self.get_queryset()))
+
+    @action(detail=True, methods=["post"])
+    def merge(self, request, pk=None):
+        """Move this category's transactions (hot and archived) and rules to category `into`, then delete it."""
+        source = self.get_object()
+        target = category_or_error(request, "into")
+        try:
+            moved = cleanup.merge(source, target)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except cleanup.ConcurrentChange as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response({"moved": moved, "category": target.id})
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)  #Save category with the logged-in user
         
 
-class TransactionListCreateView(generics.ListCreateAPIView):
+def category_or_error(request, name):
+    """The requesting user's category whose id is in request.data[name]; ValidationError otherwise."""
+    raw = request.data.get(name) if isinstance(request.data, dict) else None
+    category = Category.objects.filter(user=request.user, pk=raw).first() if str(raw).isdigit() else None
+    if category is None:
+        raise ValidationError({name: ["Invalid category."]})
+    return category
+
+
+class CategoryRuleViewSet(viewsets.ModelViewSet):
+    """Description patterns used to pick a category when importing bank statements."""
+    serializer_class = CategoryRuleSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return CategoryRule.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class RollupMaintainingMixin:
+    """Applies every transaction write to MonthlyRollup inside the same DB transaction."""
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            created = serializer.save(user=self.request.user)  # Assign transaction to logged-in user
+            rollups.record(added=[created])
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            # Re-read under a row lock so the delta is taken against what is actually stored
+            previous = Transaction.objects.select_for_update().get(pk=serializer.instance.pk)
+            updated = serializer.save()
+            rollups.record(added=[updated], removed=[previous])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            rollups.record(removed=[instance])
+
+
+class TransactionListCreateView(RollupMaintainingMixin, generics.ListCreateAPIView):
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]  # Only logged-in users can use this
+    pagination_class = TransactionCursorPagination
 
     def get_queryset(self):
         return Transaction.objects.filter(user=self.request.user)  # Filter transactions for logged-in user
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)  # Assign transaction to logged-in user
 
-
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(RollupMaintainingMixin, viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]  # Only authenticated users can use it
+    pagination_class = TransactionCursorPagination
+    BULK_MAX_ITEMS = 5000  # Upper bound for one /transactions/bulk/ request
 
     def get_queryset(self):
-        return Transaction.objects.filter(user=self.request.user)  # Only fetch user's transactions
-
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)  # Auto-assign user when creating a transaction
+        queryset = Transaction.objects.filter(user=self.request.user)  # Only fetch user's transactions
+        fields = self.get_requested_fields()
+        if fields:
+            # Only load the requested columns; date and id are needed for the pagination cursor
+            queryset = queryset.only(*{*fields, "id", "date"})
+        return queryset
+
+    def filter_queryset(self, queryset):
+        if self.action == "list":
+            queryset = filters.filter_transactions(queryset, self.request.query_params)
+        return super().filter_queryset(queryset)
+
+    @conditional_per_user()
+    @replica_reads
+    def list(self, request, *args, **kwargs):
+        """Read path that skips ModelSerializer: values_list tuples encoded straight to dicts."""
+        fields = self.get_requested_fields() or TransactionSerializer.Meta.fields
+        key, _ = self.paginator.get_ordering(request)
+        # One page from each tier, merged by the paginator
+        archived = filters.filter_transactions(ArchivedTransaction.objects.filter(user=request.user), request.query_params)
+        rows = [
+            fast_serializers.transaction_rows(self.filter_queryset(self.get_queryset()), fields, key),
+            fast_serializers.transaction_rows(archived, fields, key),
+        ]
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response(fast_serializers.encode_transactions(page, fields))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = self.get_archived(kwargs["pk"])
+            if archived is None:
+                raise
+            return Response(archived)
+
+    def get_archived(self, pk):
+        """An archived (read-only) transaction shaped like the serializer output, or None."""
+        if not str(pk).isdigit():
+            return None
+        fields = self.get_requested_fields() or TransactionSerializer.Meta.fields
+        queryset = ArchivedTransaction.objects.filter(user=self.request.user, pk=pk)
+        rows = fast_serializers.encode_transactions(fast_serializers.transaction_rows(queryset, fields), fields)
+        return rows[0] if rows else None
+
+    def get_requested_fields(self):
+        """Parse `?fields=id,amount,date` on reads, so clients can ask for only the columns they render."""
+        raw = self.request.query_params.get("fields")
+        if not raw or self.action not in ("list", "retrieve", "search_descriptions"):
+            return None
+        fields = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = set(fields) - set(TransactionSerializer.Meta.fields)
+        if unknown:
+            raise ValidationError({"fields": f"Unknown field(s): {', '.join(sorted(unknown))}"})
+        return fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields:
+            kwargs.setdefault("fields", fields)
+        return super().get_serializer(*args, **kwargs)
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """Create many transactions at once: one category query, one INSERT, all or nothing."""
+        if not isinstance(request.data, list):
+            return Response({"error": "Expected a list of transactions."}, status=status.HTTP_400_BAD_REQUEST)
+        if not request.data or len(request.data) > self.BULK_MAX_ITEMS:
+            return Response({"error": f"Send between 1 and {self.BULK_MAX_ITEMS} transactions."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Field validation needs no queries; run one serializer over every item and keep per-item errors
+        item_serializer = BulkTransactionItemSerializer()
+        items, errors = [], []
+        for raw in request.data:
+            try:
+                items.append(item_serializer.run_validation(raw))
+                errors.append({})
+            except ValidationError as exc:
+                items.append(None)
+                errors.append(exc.detail)
+
+        # Fetch every referenced category the user owns in one query
+        category_ids = {item["category"] for item in items if item is not None}
+        category_types = dict(
+            Category.objects.filter(user=request.user, id__in=category_ids).values_list("id", "category_type")
+        )
+
+        home = fx.home_currency(request.user)
+        fx.rates.sync()  # Once per batch; the lookups below only read the in-process table
+        for index, item in enumerate(items):
+            if item is None:
+                continue
+            category_type = category_types.get(item["category"])
+            if category_type is None:
+                errors[index] = {"category": ["Invalid category."]}
+            elif category_type != item["transaction_type"]:
+                errors[index] = {"non_field_errors": ["Category type must match transaction type."]}
+            else:
+                item.setdefault("currency", home)
+                try:
+                    check_convertible(item["currency"], home, item["date"])  # In-process rate table, no query
+                except ValidationError as exc:
+                    errors[index] = exc.detail
+
+        if any(errors):
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        transactions = [
+            Transaction(
+                user=request.user,
+                category_id=item["category"],
+                amount=item["amount"],
+                currency=item["currency"],
+                transaction_type=item["transaction_type"],
+                description=item.get("description"),
+                date=item["date"],
+            )
+            for item in items
+        ]
+        with transaction.atomic():
+            created = Transaction.objects.bulk_create(transactions, batch_size=1000)
+            rollups.record(added=created)
+            user_data_changed(request.user.pk)  # bulk_create sends no post_save signals
+
+        return Response({"created": len(created), "ids": [tx.id for tx in created]}, status=status.HTTP_201_CREATED)
+
+    def get_matching(self, request):
+        """Both tiers filtered by the list filters in the query string, of which at least one is required."""
+        if not any(request.query_params.get(name) for name in filters.PARAMS):
+            raise ValidationError({"filters": f"Give at least one of: {', '.join(filters.PARAMS)}."})
+        return [
+            filters.filter_transactions(model.objects.filter(user=request.user), request.query_params)
+            for model in (Transaction, ArchivedTransaction)
+        ]
+
+    @action(detail=False, methods=["post"], url_path="recategorize")
+    def recategorize(self, request):
+        """Move every transaction matching the list filters to the `category` in the body, in one UPDATE per tier."""
+        target = category_or_error(request, "category")
+        try:
+            updated = cleanup.recategorize(self.get_matching(request), target)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except cleanup.ConcurrentChange as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response({"updated": updated})
+
+    @action(detail=False, methods=["post"], url_path="bulk-delete")
+    def bulk_delete(self, request):
+        """Delete every transaction matching the list filters, in one DELETE per tier."""
+        try:
+            deleted = cleanup.delete(self.get_matching(request))
+        except cleanup.ConcurrentChange as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
+        return Response({"deleted": deleted})
+
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser])
+    def import_statement(self, request):
+        """Import a CSV or OFX bank statement uploaded as `file`, streaming it row by row.
+
+        `date_order` ("dmy", the default, or "mdy") says how the statement writes slashed dates.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "Upload the statement as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        statement_format = importers.detect_format(upload.name, request.data.get("file_type"))
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", errors="replace", newline="")
+        try:
+            rows = importers.parse_statement(stream, statement_format)
+            importer = importers.StatementImporter(request.user, date_order=request.data.get("date_order") or "dmy")
+            result = importer.run(rows)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        finally:
+            stream.detach()  # Leave closing the upload to Django
+
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="search", url_name="search")
+    @replica_reads
+    def search_descriptions(self, request):
+        """Ranked full-text search over descriptions: ?q=uber (every word matches as a prefix), plus
+        the list filters (see finance.filters), ?fields= and ?page=."""
+        query = request.query_params.get("q", "")
+        if not search.terms(query):
+            raise ValidationError({"q": "Give at least one word to search for."})
+        fields = self.get_requested_fields() or TransactionSerializer.Meta.fields
+        # Both tiers, each ranked on its own index and merged by the paginator
+        tiers = [
+            fast_serializers.transaction_rows(
+                search.search(filters.filter_transactions(model.objects.filter(user=request.user), request.query_params), query),
+                fields, ranked=True,
+            )
+            for model in (Transaction, ArchivedTransaction)
+        ]
+
+        paginator = SearchResultsPagination()
+        page = paginator.paginate_queryset(tiers, request, view=self)
+        return paginator.get_paginated_response(fast_serializers.encode_transactions(page, fields))
+
+    @action(detail=False, methods=["get"], url_path="export")
+    @replica_reads
+    def export(self, request):
+        """Stream the user's transactions as CSV or NDJSON (?file_type= plus the list filters)."""
+        file_type = request.query_params.get("file_type", "csv")
+        if file_type not in exports.CONTENT_TYPES:
+            raise ValidationError({"file_type": "Use 'csv' or 'ndjson'."})
+
+        # Pin the database now; the rows are only read after this method has returned
+        querysets = [
+            filters.filter_transactions(model.objects.filter(user=request.user), request.query_params).using(router.db_for_read(model))
+            for model in (ArchivedTransaction, Transaction)
+        ]
+
+        # Rows are pulled lazily from server-side cursors (one per tier) while the response is being sent
+        response = StreamingHttpResponse(
+            exports.stream(exports.export_rows(*querysets), file_type),
+            content_type=exports.CONTENT_TYPES[file_type],
+        )
+        response["Content-Disposition"] = f'attachment; filename="transactions.{file_type}"'
+        return response
 
 class FinancialSummaryView(APIView):
     permission_classes = [IsAuthenticated]  # Only logged-in users can access
 
+    @conditional_per_user()
+    @cached_per_user()
+    @replica_reads
     def get(self, request):
         user = request.user  # Get the logged-in user
-        print("Current user:", user)
 
-        # Calculate total income and expenses
-        total_income = Transaction.objects.filter(user=user, transaction_type="income").aggregate(total=models.Sum("amount"))["total"] or 0
-        total_expense = Transaction.objects.filter(user=user, transaction_type="expense").aggregate(total=models.Sum("amount"))["total"] or 0
+        # Calculate total income and expenses from the monthly rollups (one row per month/category)
+        totals = rollups.totals_by_type(user)
+        total_income = totals["income"]
+        total_expense = totals["expense"]
 
         balance = total_income - total_expense  # Remaining balance
 
@@ -153,19 +427,16 @@ class BudgetView(generics.GenericAPIView):
     serializer_class = BudgetSerializer
     permission_classes = [IsAuthenticated]
 
+    @cached_per_user(vary_on=current_month_key)
     def get(self, request):
         """Retrieve the budget for the current month"""
-        current_month = datetime.now().strftime("%Y-%m")
+        current_month = rollups.month_start(datetime.now().date())
         budget = Budget.objects.filter(user=request.user, month=current_month).first()
         if not budget:
             return Response({"message": "No budget set for this month."}, status=status.HTTP_404_NOT_FOUND)
 
         # Calculate total expenses for the current month
-        total_expenses = Transaction.objects.filter(
-            user=request.user,
-            transaction_type="expense",
-            date__startswith=current_month
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
+        total_expenses = rollups.totals_by_type(request.user, month=current_month)["expense"]
 
         remaining_budget = float(budget.amount) - float(total_expenses)
 
@@ -194,47 +465,155 @@ class BudgetView(generics.GenericAPIView):
 class BudgetSummaryView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @cached_per_user()
+    @replica_reads
     def get(self, request, month):
         user = request.user
-        print("Current user:", user)
-        print("Requested month:", month)
-        
+
         try:
             # Parse month from URL (expected format: YYYY-MM)
-            year, month_num = map(int, month.split('-'))
-            start_date = datetime(year, month_num, 1)
-            end_date = datetime(year, month_num + 1, 1) if month_num < 12 else datetime(year + 1, 1, 1)
-
-            # Get user's budget for the given month (any date within the month)
-            budget_obj = Budget.objects.filter(
-                user=user,
-                month__gte=start_date.date(),
-                month__lt=end_date.date()
-            ).first()
-
-            budget_amount = budget_obj.amount if budget_obj else 0  # Default to 0 if no budget set
-
-            # Calculate total expenses for the month
-            total_expenses = Transaction.objects.filter(
-                user=user, 
-                transaction_type="expense", 
-                date__gte=start_date, 
-                date__lt=end_date
-            ).aggregate(total=models.Sum('amount'))['total'] or 0  # Default to 0
-
-            # Calculate remaining budget
-            remaining_budget = budget_amount - total_expenses
-            over_budget = total_expenses > budget_amount
-
-            # Response data
-            data = {
-                "month": f"{year}-{month_num:02d}",
-                "budget": float(budget_amount),
-                "total_expenses": float(total_expenses),
-                "remaining_budget": float(remaining_budget),
-                "over_budget": over_budget
-            }
-            return Response(data, status=200)
+            start_date = analytics.parse_month(month)
+        except ValueError:
+            return Response({"error": "Invalid month format. Use YYYY-MM."}, status=400)
+
+        # Budget and expenses for the month, 0 if no budget is set
+        summary = budgets.for_months(user, [start_date])[0]
+        data = {
+            "month": f"{start_date:%Y-%m}",
+            "budget": float(summary.budget),
+            "total_expenses": float(summary.spent),
+            "remaining_budget": float(summary.remaining),
+            "over_budget": summary.over_budget
+        }
+        return Response(data, status=200)
+
+
+class DashboardView(APIView):
+    """Totals, this month's budget, the categories and the ?recent= (default 10) latest transactions in one response."""
+    permission_classes = [IsAuthenticated]
+    RECENT_DEFAULT = 10
+    RECENT_MAX = 50
 
+    @conditional_per_user(vary_on=current_month_key)
+    @cached_per_user(vary_on=current_month_key)
+    @replica_reads
+    def get(self, request):
+        try:
+            recent = int(request.query_params.get("recent", self.RECENT_DEFAULT))
         except ValueError:
-            return Response({"error": "Invalid month format. Use YYYY-MM."}, status=400)
\ No newline at end of file
+            recent = -1
+        if not 0 <= recent <= self.RECENT_MAX:
+            return Response({"error": f"recent must be between 0 and {self.RECENT_MAX}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Three queries: totals and budget status (conditional aggregation over the rollups),
+        # the categories, and the latest transactions across both tiers
+        current_month = rollups.month_start(datetime.now().date())
+        overview = rollups.overview(request.user, current_month)
+        budget = overview["budget"]
+        spent = overview["month_expense"]
+
+        fields = TransactionSerializer.Meta.fields
+        latest = []
+        if recent:
+            tiers = [
+                fast_serializers.transaction_rows(model.objects.filter(user=request.user), fields)
+                for model in (Transaction, ArchivedTransaction)
+            ]
+            latest = tiers[0].union(tiers[1], all=True).order_by("-cursor_key", "-cursor_id")[:recent]
+
+        return Response({
+            "totals": {
+                "total_income": overview["income"],
+                "total_expense": overview["expense"],
+                "balance": overview["income"] - overview["expense"],
+            },
+            "budget": {
+                "month": f"{current_month:%Y-%m}",
+                "budget": None if budget is None else float(budget),
+                "expenses": float(spent),
+                "remaining": None if budget is None else float(budget - spent),
+                "over_budget": budget is not None and spent > budget,
+            },
+            "categories": fast_serializers.encode_categories(Category.objects.filter(user=request.user)),
+            "recent_transactions": fast_serializers.encode_transactions(latest, fields),
+        })
+
+
+class TimeseriesView(APIView):
+    """Monthly income/expense series for trend charts: /analytics/timeseries/?from=YYYY-MM&to=YYYY-MM&group_by=type|category"""
+    permission_classes = [IsAuthenticated]
+
+    @cached_per_user(vary_on=current_month_key)  # Without ?to= the window ends at the current month
+    @replica_reads
+    def get(self, request):
+        group_by = request.query_params.get("group_by", "type")
+        if group_by not in ("type", "category"):
+            return Response({"error": "group_by must be 'type' or 'category'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            end = analytics.parse_month(request.query_params.get("to") or datetime.now().strftime("%Y-%m"))
+            start = analytics.parse_month(request.query_params["from"]) if request.query_params.get("from") else None
+        except ValueError:
+            return Response({"error": "Invalid month format. Use YYYY-MM."}, status=status.HTTP_400_BAD_REQUEST)
+        if start is None:
+            start = analytics.add_months(end, -11)  # Default to the last 12 months
+        if start > end or len(analytics.month_range(start, end)) > analytics.MAX_MONTHS:
+            return Response(
+                {"error": f"'from' must not be after 'to' and the range is limited to {analytics.MAX_MONTHS} months."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(analytics.timeseries(request.user, start, end, group_by))
+
+
+class CategoryBreakdownView(APIView):
+    """Per-category totals, counts and share of total: /analytics/categories/?date_from=&date_to=&type="""
+    permission_classes = [IsAuthenticated]
+
+    @cached_per_user()
+    @replica_reads
+    def get(self, request):
+        data = analytics.category_breakdown(*(
+            filters.filter_transactions(model.objects.filter(user=request.user), request.query_params)
+            for model in (Transaction, ArchivedTransaction)
+        ))
+        data["date_from"] = request.query_params.get("date_from")
+        data["date_to"] = request.query_params.get("date_to")
+        return Response(data)
+
+
+class CacheStatsView(APIView):
+    """Response cache hit/miss counters for this worker process."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(response_cache.stats())
+
+
+class MetricsPermission(permissions.BasePermission):
+    """Prometheus scrapers send `Authorization: Bearer <METRICS_TOKEN>`; otherwise admins only."""
+
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        if token and request.headers.get("Authorization") == f"Bearer {token}":
+            return True
+        return bool(request.user and request.user.is_staff)
+
+
+class MetricsView(APIView):
+    """Per-route request histograms and cache counters in the Prometheus text format."""
+    permission_classes = [MetricsPermission]
+
+    def get(self, request):
+        cache_stats = response_cache.stats()
+        lines = instrumentation.render_prometheus() + [
+            "# HELP spendwise_response_cache_total Response cache lookups in this process.",
+            "# TYPE spendwise_response_cache_total counter",
+            f'spendwise_response_cache_total{{result="hit"}} {cache_stats["hits"]}',
+            f'spendwise_response_cache_total{{result="miss"}} {cache_stats["misses"]}',
+            "# HELP spendwise_auth_cache_total Access token cache lookups in this process.",
+            "# TYPE spendwise_auth_cache_total counter",
+            f'spendwise_auth_cache_total{{result="hit"}} {user_cache.hits}',
+            f'spendwise_auth_cache_total{{result="miss"}} {user_cache.misses}',
+        ]
+        return HttpResponse("\n".join(lines) + "\n", content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 from corsheaders.defaults import default_headers
 load_dotenv()
@@ -52,6 +53,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'spend_wise.utils.instrumentation.PerformanceMiddleware',  # First, so it times everything below it
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -111,6 +113,19 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing cost. Raising or lowering it re-hashes each user's password on their next login;
+# measure the effect with `python manage.py bench_login` before changing it in production.
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", 1_000_000))
+
+PASSWORD_HASHERS = [
+    'spend_wise.utils.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  
     "https://spendwise-ui.vercel.app",  
@@ -141,11 +156,13 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',  # Ensure this is included
+        'spend_wise.utils.renderers.FastJSONRenderer',
     ],
 }
 
+if DEBUG:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('rest_framework.renderers.BrowsableAPIRenderer')  # Only for local development
+
 
 
 
@@ -157,7 +174,45 @@ SIMPLE_JWT = {
     "ALGORITHM": "HS256",
     "SIGNING_KEY": os.getenv("JWT_SECRET"),  # Replace with your actual secret key
     'TOKEN_BLACKLIST_ENABLED': True,
+    # Checks refresh tokens against an in-process copy of the blacklist (spend_wise/utils/revocation.py);
+    # only with a shared cache backend below, the database otherwise
+    "TOKEN_REFRESH_SERIALIZER": "spend_wise.utils.revocation.IndexedTokenRefreshSerializer",
+}
+JWT_REVOCATION_INDEX_TTL = int(os.getenv("JWT_REVOCATION_INDEX_TTL", 300))  # Seconds between full rebuilds
+
+# Response cache for the summary/budget endpoints, and the keys that tell every worker about
+# revoked tokens, signed-out users and reloaded rates. Defaults to per-process memory; point
+# DJANGO_CACHE_BACKEND/DJANGO_CACHE_LOCATION at a shared cache (e.g. Redis) in production.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", "spendwise"),
+    }
 }
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 3600))  # Seconds
+
+# Request instrumentation (spend_wise/utils/instrumentation.py)
+# Share of requests logged; none under `manage.py test`, so the test output doesn't vary run to run
+REQUEST_LOG_SAMPLE_RATE = float(os.getenv("REQUEST_LOG_SAMPLE_RATE", 0 if sys.argv[1:2] == ["test"] else 0.01))
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", 500))  # Slower requests are always logged
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # Bearer token for /api/metrics; admins only when unset
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "spend_wise.requests": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
+# In-process cache of validated access tokens (see spend_wise/utils/authentication.py)
+JWT_USER_CACHE_SIZE = int(os.getenv("JWT_USER_CACHE_SIZE", 10000))
+# Seconds. Other workers hear of a logout, deactivation or delete through CACHES; with the
+# default per-process cache they keep accepting the user's cached tokens for up to this long.
+JWT_USER_CACHE_TTL = int(os.getenv("JWT_USER_CACHE_TTL", 300))
 
 
 
@@ -191,19 +246,40 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # load_dotenv()
 # Set up database connection using environment variables
 
-tmpPostgres = urlparse(os.getenv("DATABASE_URL"))
-
-DATABASES = {
-    'default': {
+def database_from_url(url):
+    """Build a DATABASES entry from a postgres:// or sqlite:///path URL."""
+    parsed = urlparse(url)
+    if parsed.scheme == "sqlite":
+        return {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': parsed.path[1:],  # sqlite:///db.sqlite3 is relative, sqlite:////tmp/db.sqlite3 absolute
+        }
+    return {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': tmpPostgres.path.replace('/', ''),
-        'USER': tmpPostgres.username,
-        'PASSWORD': tmpPostgres.password,
-        'HOST': tmpPostgres.hostname,
-        'PORT': 5432,
+        'NAME': parsed.path.replace('/', ''),
+        'USER': parsed.username,
+        'PASSWORD': parsed.password,
+        'HOST': parsed.hostname,
+        'PORT': parsed.port or 5432,
          "OPTIONS": {
             "sslmode": "require"
         },
     }
-}
 
+
+if os.getenv("DATABASE_URL"):
+    DATABASES['default'] = database_from_url(os.getenv("DATABASE_URL"))
+
+# Optional read replica for reporting reads (summaries, analytics, transaction list, exports).
+# Reads are only sent there from views that opt in; see spend_wise/utils/db_router.py.
+if os.getenv("DATABASE_REPLICA_URL"):
+    DATABASES['replica'] = database_from_url(os.getenv("DATABASE_REPLICA_URL"))
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['spend_wise.utils.db_router.ReplicaRouter']
+REPLICA_READ_YOUR_WRITES_SECONDS = int(os.getenv("REPLICA_READ_YOUR_WRITES_SECONDS", 5))  # Keep a user on the primary this long after they write
+
+# Currencies (finance/fx.py)
+DEFAULT_CURRENCY = os.getenv("DEFAULT_CURRENCY", "USD")  # Home currency of users without a profile
+FX_BASE_CURRENCY = os.getenv("FX_BASE_CURRENCY", "USD")  # The currency rates in FxRate are quoted in
+FX_RATES_TTL = int(os.getenv("FX_RATES_TTL", 300))  # Seconds before a worker reloads its in-process rate table
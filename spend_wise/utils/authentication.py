@@ -1,17 +1,34 @@
-from rest_framework.authentication import BaseAuthentication
-from rest_framework.exceptions import AuthenticationFailed
-from rest_framework_simplejwt.tokens import AccessToken
+import copy
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .ttl_cache import TTLCache
+
+# Validated access tokens and their users, keyed by the raw token string. A hit skips both the
+# signature check and the auth_user query; it only costs a read of the user's version key in the
+# shared cache, which invalidate_user() changes so every worker drops its entries. Entries live at
+# most JWT_USER_CACHE_TTL seconds, which bounds the staleness when the cache isn't shared.
+user_cache = TTLCache(
+    max_entries=getattr(settings, "JWT_USER_CACHE_SIZE", 10000),
+    ttl=getattr(settings, "JWT_USER_CACHE_TTL", 300),
+)
+USER_VERSION_KEY = "auth:version:{user_id}"
+
+
+def _version_key(user_id):
+    return USER_VERSION_KEY.format(user_id=user_id)
+
 
-class JWTAuthenticationFromCookie(JWTAuthentication):
-    def authenticate(self, request):
-        raw_token = request.COOKIES.get('access_token')
-        if raw_token is None:
-            return None
-        validated_token = self.get_validated_token(raw_token)
-        return self.get_user(validated_token), validated_token
-        
 class CookieJWTAuthentication(JWTAuthentication):
     def authenticate(self, request):
         access_token = request.COOKIES.get('access_token')
@@ -19,5 +36,77 @@ class CookieJWTAuthentication(JWTAuthentication):
         if access_token is None:
             return None
 
+        cached = user_cache.get(access_token)
+        if cached is not None:
+            user, validated_token, version = cached
+            if cache.get(_version_key(user.pk)) == version:
+                return copy.copy(user), validated_token  # Requests never share a user instance
+
         validated_token = self.get_validated_token(access_token)
-        return self.get_user(validated_token), validated_token
\ No newline at end of file
+        # Read before the user, so an invalidation that races the lookup leaves a stale version behind
+        version = cache.get(_version_key(validated_token.get(api_settings.USER_ID_CLAIM)))
+        user = self.get_user(validated_token)
+        remaining = validated_token.get("exp", 0) - time.time()
+        user_cache.set(access_token, (user, validated_token, version), ttl=remaining, tag=user.pk)
+        return user, validated_token
+
+
+async def aauthenticate(request):
+    """Authenticate a plain Django async view the same way as CookieJWTAuthentication.
+
+    Cache hits stay on the event loop; misses verify the token and fetch the user in a worker thread.
+    """
+    access_token = request.COOKIES.get('access_token')
+    if access_token is None:
+        return None
+    cached = user_cache.get(access_token)
+    if cached is not None:
+        user, validated_token, version = cached
+        if await cache.aget(_version_key(user.pk)) == version:
+            return copy.copy(user), validated_token
+    return await sync_to_async(CookieJWTAuthentication().authenticate)(request)
+
+
+def set_auth_cookies(response, refresh):
+    """Attach the access and refresh cookies CookieJWTAuthentication reads."""
+    response.set_cookie(
+        key='access_token',
+        value=str(refresh.access_token),
+        httponly=True,
+        secure=True,
+        samesite='None',  # IMPORTANT for cross-origin cookies
+        max_age=36000
+    )
+    response.set_cookie(
+        key='refresh_token',
+        value=str(refresh),
+        httponly=True,
+        secure=True,
+        samesite='None',  # IMPORTANT
+        max_age=7 * 24 * 3600
+    )
+    return response
+
+
+def _publish(user_id):
+    # Expiring with the entries is safe: a version that is gone no longer matches any of them
+    cache.set(_version_key(user_id), uuid.uuid4().hex, timeout=user_cache.ttl)
+
+
+def invalidate_user(user_id):
+    """Drop every cached token for a user, e.g. on logout, in this process and (through the
+    user's version key) every other one.
+
+    Published immediately and again on commit, so a worker that read the user before the
+    change committed can't cache it under the new version.
+    """
+    user_cache.invalidate_tag(user_id)
+    _publish(user_id)
+    transaction.on_commit(lambda: _publish(user_id))
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def _invalidate_changed_user(sender, instance, **kwargs):
+    # Deactivation, password changes and deletes must not be served from the cache
+    invalidate_user(instance.pk)
@@ -0,0 +1,86 @@
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+REPLICA_ALIAS = "replica"
+LAST_WRITE_KEY = "db:last_write:{user_id}"
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def _window():
+    return getattr(settings, "REPLICA_READ_YOUR_WRITES_SECONDS", 5)
+
+
+def mark_written(user_id):
+    """Pin a user's reads to the primary for a short window after they write."""
+    cache.set(LAST_WRITE_KEY.format(user_id=user_id), time.time(), timeout=_window())
+
+
+def recently_wrote(user_id):
+    return cache.get(LAST_WRITE_KEY.format(user_id=user_id)) is not None
+
+
+async def arecently_wrote(user_id):
+    return await cache.aget(LAST_WRITE_KEY.format(user_id=user_id)) is not None
+
+
+@contextmanager
+def _reads_to_replica(enabled):
+    if not enabled:
+        yield
+        return
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def use_replica(user_id=None):
+    """Route ORM reads inside the block to the replica, unless the user wrote within the window."""
+    return _reads_to_replica(user_id is None or not recently_wrote(user_id))
+
+
+@asynccontextmanager
+async def ause_replica(user_id=None):
+    """use_replica for async views; the window check doesn't block the event loop."""
+    with _reads_to_replica(user_id is None or not await arecently_wrote(user_id)):
+        yield
+
+
+def replica_reads(view_method):
+    """Decorator for read-only DRF view methods (self, request, ...)."""
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        with use_replica(request.user.pk):
+            return view_method(self, request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Sends reads made under use_replica() to the "replica" database when one is configured.
+
+    Everything else, including all writes and migrations, goes to "default".
+    """
+
+    def __init__(self):
+        self.replica = REPLICA_ALIAS if REPLICA_ALIAS in settings.DATABASES else None
+
+    def db_for_read(self, model, **hints):
+        if self.replica and _replica_reads.get():
+            return self.replica
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # Both aliases hold the same data
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
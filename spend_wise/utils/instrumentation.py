@@ -0,0 +1,199 @@
+import json
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("spend_wise.requests")
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense, one series per label set."""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self._series = {}  # labels tuple -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.setdefault(labels, [0] * len(self.buckets) + [0.0, 0])
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):  # Larger values only show up in the +Inf bucket (the count)
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self, label_names):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            base = _labels(label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, label_names):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{{{_labels(label_names, labels)}}} {value}" for labels, value in items)
+        return lines
+
+
+def _labels(names, values):
+    return ",".join(f'{name}="{str(value).replace(chr(34), chr(39))}"' for name, value in zip(names, values))
+
+
+ROUTE_LABELS = ("view", "method")
+request_duration = Histogram("spendwise_request_duration_seconds", "Total time spent handling the request.", DURATION_BUCKETS)
+request_db_duration = Histogram("spendwise_request_db_seconds", "Time spent in database queries per request.", DURATION_BUCKETS)
+request_render_duration = Histogram("spendwise_request_render_seconds", "Time spent rendering the response body.", DURATION_BUCKETS)
+request_queries = Histogram("spendwise_request_db_queries", "Database queries per request.", QUERY_BUCKETS)
+requests_total = Counter("spendwise_requests_total", "Requests handled, by route, method and status.")
+
+
+def render_prometheus():
+    """All request metrics in the Prometheus text exposition format."""
+    lines = []
+    for histogram in (request_duration, request_db_duration, request_render_duration, request_queries):
+        lines.extend(histogram.render(ROUTE_LABELS))
+    lines.extend(requests_total.render(ROUTE_LABELS + ("status",)))
+    return lines
+
+
+class QueryTimer:
+    """Counts queries and adds up their time for one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+@contextmanager
+def timed_queries(timer):
+    """Run `timer` around every query this thread sends to any database while the block is open."""
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(timer))
+        yield timer
+
+
+class PerformanceMiddleware:
+    """Times each request (total, DB, render), reports it in a Server-Timing header, records it in the
+    per-route histograms served by /api/metrics, and logs a sampled JSON line per request.
+
+    Sync and async capable, so it keeps an ASGI request chain async.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.sample_rate = getattr(settings, "REQUEST_LOG_SAMPLE_RATE", 0.01)
+        self.slow_ms = getattr(settings, "SLOW_REQUEST_MS", 500)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with timed_queries(QueryTimer()) as timer:
+            response = self.get_response(request)
+        return self.record(request, response, timer, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        # An async request's ORM calls run on its thread-sensitive sync thread, so the wrappers go
+        # on that thread's connections; other requests' threads have connections of their own
+        queries = timed_queries(QueryTimer())
+        timer = await sync_to_async(queries.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(queries.__exit__)(None, None, None)
+        return self.record(request, response, timer, time.perf_counter() - started)
+
+    def record(self, request, response, timer, total):
+        render = getattr(request, "_render_seconds", 0.0)
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unmatched"  # URL names keep the label set small and readable
+        labels = (view, request.method)
+
+        request_duration.observe(labels, total)
+        request_db_duration.observe(labels, timer.seconds)
+        request_render_duration.observe(labels, render)
+        request_queries.observe(labels, timer.count)
+        requests_total.inc(labels + (response.status_code,))
+
+        app = max(total - timer.seconds - render, 0.0)
+        response["Server-Timing"] = (
+            f'db;dur={timer.seconds * 1000:.2f};desc="{timer.count} queries", '
+            f"render;dur={render * 1000:.2f}, app;dur={app * 1000:.2f}, total;dur={total * 1000:.2f}"
+        )
+
+        total_ms = total * 1000
+        if total_ms >= self.slow_ms or random.random() < self.sample_rate:
+            user = getattr(request, "user", None)
+            logger.info(json.dumps({
+                "view": view,
+                "method": request.method,
+                "status": response.status_code,
+                "user_id": getattr(user, "pk", None),
+                "total_ms": round(total_ms, 2),
+                "db_ms": round(timer.seconds * 1000, 2),
+                "queries": timer.count,
+                "render_ms": round(render * 1000, 2),
+                "slow": total_ms >= self.slow_ms,
+            }))
+        return response
+
+    def process_template_response(self, request, response):
+        # First in MIDDLEWARE, so the last template-response hook to run: the handler calls
+        # response.render() right after it, and the post-render callback stops the clock
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._render_seconds = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,27 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to DRF's renderer
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Compact JSON renderer backed by orjson when it is installed.
+
+    Types orjson doesn't handle the way DRF does (Decimal, datetimes, lazy
+    strings...) go through DRF's JSONEncoder, so the output matches JSONRenderer.
+    """
+    _default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)  # Pretty output stays on the stdlib path
+        return orjson.dumps(
+            data,
+            default=self._default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
@@ -0,0 +1,104 @@
+"""In-process index of revoked refresh tokens.
+
+simplejwt checks every refresh token against token_blacklist_blacklistedtoken. This keeps the
+JTIs of blacklisted, not yet expired tokens in a set per process instead, so a check is a
+set lookup plus one read of a shared cache key:
+
+* every new BlacklistedToken bumps REVOCATION_VERSION_KEY on commit, and a process that sees a
+  new version loads only the rows added since its last load (by id);
+* every JWT_REVOCATION_INDEX_TTL seconds the index is rebuilt from scratch, which also drops
+  expired and un-blacklisted tokens and catches rows committed out of id order.
+
+The version key only reaches other workers through a shared cache. With a per-process one
+(the LocMemCache default) a token rotated on one worker would stay usable on the others until
+their next rebuild, so refresh tokens are then checked against the database, as simplejwt does.
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from . import shared_cache
+
+REVOCATION_VERSION_KEY = "jwt-revocations:version"
+
+
+class RevocationIndex:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._revoked = set()  # JTIs
+        self._high_water = 0  # Largest BlacklistedToken id loaded
+        self._version = None
+        self._rebuilt_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def is_revoked(self, jti):
+        self.sync()
+        return jti in self._revoked
+
+    def sync(self):
+        version = cache.get(REVOCATION_VERSION_KEY)
+        if not self._is_stale() and version == self._version:
+            return
+        with self._lock:
+            rebuild = self._is_stale()
+            # A rebuild fills a new set and swaps it in, so readers never see a half-built one;
+            # incremental loads only add to it. Expired JTIs go at rebuilds (they fail the exp check anyway).
+            revoked, high_water = (set(), 0) if rebuild else (self._revoked, self._high_water)
+            rows = BlacklistedToken.objects.filter(
+                id__gt=high_water, token__expires_at__gt=aware_utcnow()
+            ).values_list("id", "token__jti")
+            for row_id, jti in rows:
+                revoked.add(jti)
+                high_water = max(high_water, row_id)
+            self._revoked, self._high_water, self._version = revoked, high_water, version
+            if rebuild:
+                self._rebuilt_at = time.monotonic()
+
+    def _is_stale(self):
+        return self._rebuilt_at is None or time.monotonic() - self._rebuilt_at >= self.ttl
+
+    def clear(self):
+        with self._lock:
+            self._revoked, self._high_water, self._version, self._rebuilt_at = set(), 0, None, None
+
+
+revocation_index = RevocationIndex(ttl=getattr(settings, "JWT_REVOCATION_INDEX_TTL", 300))
+
+
+class IndexedRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        if not shared_cache.is_shared():
+            return super().check_blacklist()  # Other workers' revocations can't reach the index
+        if revocation_index.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+
+class IndexedTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = IndexedRefreshToken
+
+
+def bump_revocations():
+    transaction.on_commit(lambda: cache.set(REVOCATION_VERSION_KEY, uuid.uuid4().hex, None))
+
+
+# No post_delete receiver: it would stop prune_tokens from bulk-deleting, and un-blacklisted
+# tokens are rare enough to wait for the next rebuild.
+@receiver(post_save, sender=BlacklistedToken)
+def _blacklist_changed(sender, **kwargs):
+    bump_revocations()
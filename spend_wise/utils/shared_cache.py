@@ -0,0 +1,14 @@
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Backends whose keys no other worker process can see
+PER_PROCESS_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared(alias="default"):
+    """Whether a key set in the cache is visible to every worker process (Redis, Memcached, files, the DB).
+
+    In-process copies that learn about changes through a cache key must not rely on it otherwise.
+    """
+    return not isinstance(caches[alias], PER_PROCESS_BACKENDS)